@@ -0,0 +1,39 @@
+"""
+Reports the python memory used per component node created from a template.
+
+Usage: python benchmarks/component_memory.py [rows]
+"""
+import sys
+import tracemalloc
+
+from taktk.component import Component
+from taktk.component.incremental import count_nodes
+
+ROW = r"""
+    \frame pos:grid={{(0, {0})}} lay:w:x='0:5,1:1'
+        \label text='row {0}' pos:grid=0,0 pos:sticky='nsew'
+        \button text='open' pos:grid=1,0 pos:sticky='e'"""
+
+
+def make_page(rows: int) -> type:
+    code = r"\frame padding=5" + "".join(ROW.format(i) for i in range(rows))
+    return type("Page", (Component,), {"_code_": code})
+
+
+def main(rows: int = 10_000):
+    Page = make_page(rows)
+    Page()  # warms the per template caches
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    page = Page()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    nodes = count_nodes(page._component_)
+    print(f"nodes: {nodes}")
+    print(f"total: {size / 1024:.1f} KiB")
+    print(f"bytes per node: {size / nodes:.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""
+Renders components and navigates pages with the headless backend,
+reporting the time and the tcl calls each operation costs.
+
+Usage: python benchmarks/render.py [rows] [repeat]
+"""
+import sys
+import types
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+
+from taktk.application import Application
+from taktk.component import Component
+from taktk.component.backend import HeadlessBackend, set_backend
+from taktk.page import PageView
+from taktk.store import Store
+
+ROW = r"""
+    \frame pos:grid={{(0, {0})}} lay:w:x='0:5,1:1'
+        \label text='row {0}' pos:grid=0,0 pos:sticky='nsew'
+        \button text='open' pos:grid=1,0 pos:sticky='e'"""
+
+
+def make_page(rows: int) -> type:
+    code = r"\frame padding=5" + "".join(ROW.format(i) for i in range(rows))
+    return type("Page", (Component,), {"_code_": code})
+
+
+def make_pages(Page: type) -> types.ModuleType:
+    pages = types.ModuleType("pages")
+    pages.__package__ = "pages"
+    pages.default = lambda store: Page()
+    return pages
+
+
+def report(name: str, backend: HeadlessBackend, func, repeat: int):
+    with backend.recording() as calls:
+        begin = perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = perf_counter() - begin
+    total = sum(calls.values())
+    print(f"{name}: {elapsed / repeat * 1000:.2f}ms, {total // repeat} calls")
+    for call, n in calls.most_common():
+        print(f"    {call}: {n // repeat}")
+
+
+def main(rows: int = 200, repeat: int = 10):
+    backend = HeadlessBackend()
+    set_backend(backend)
+    root = backend.root()
+    Page = make_page(rows)
+
+    report("instantiate", backend, Page, repeat)
+    report("render", backend, lambda: Page().render(root).destroy(), repeat)
+
+    with NamedTemporaryFile(suffix=".json", delete=False) as f:
+        path = f.name
+    app = Application(make_pages(Page), store=Store(path))
+    app.setup_taktk()
+    view = PageView(root, app.pages, app)
+    report("navigate", backend, lambda: view.url("/"), repeat)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
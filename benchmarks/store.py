@@ -0,0 +1,76 @@
+"""
+Compares the store codecs, reporting the time to save and load a store
+of generated records and the size of it's file, then the time and peak
+python memory to open a store and read one of it's keys, eagerly and
+with the `LazyStore`.
+
+Usage: python benchmarks/store.py [records] [repeat]
+"""
+import os
+import sys
+import tracemalloc
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from taktk.lazy_store import LazyStore
+from taktk.store import CODECS, Store
+
+
+def make_data(records: int) -> dict:
+    return {
+        "language": "english",
+        "history": [f"/todos/{i}?page={i % 7}" for i in range(records)],
+        "todos": [
+            {
+                "uuid": f"{i:08x}-68cb-11ef-81b3-28d244ed9304",
+                "author_id": f"{i % 50:08x}-68cb-11ef-81b3-28d244ed9304",
+                "desc": f"todo number {i}",
+                "done": i % 3 == 0,
+                "tags": ["home", "work"][: i % 3],
+                "priority": i % 5 / 4,
+            }
+            for i in range(records)
+        ],
+    }
+
+
+def timed(func, repeat: int) -> float:
+    begin = perf_counter()
+    for _ in range(repeat):
+        func()
+    return (perf_counter() - begin) / repeat
+
+
+def open_one(name: str, open_store, repeat: int):
+    tracemalloc.start()
+    elapsed = timed(lambda: open_store()["language"], repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"open and read one key, {name}: {elapsed * 1000:.2f}ms,"
+        f" peak {peak / 1024:.1f} KiB"
+    )
+
+
+def main(records: int = 10_000, repeat: int = 10):
+    data = make_data(records)
+    with TemporaryDirectory() as directory:
+        for name in CODECS:
+            path = os.path.join(directory, f"store.{name}")
+            store = Store(path, data, codec=name)
+            save = timed(store.save, repeat)
+            load = timed(lambda: Store(path, codec=name), repeat)
+            size = os.path.getsize(path)
+            print(
+                f"{name}: save {save * 1000:.2f}ms, load {load * 1000:.2f}ms,"
+                f" {size / 1024:.1f} KiB"
+            )
+        json_path = os.path.join(directory, "store.json")
+        path = os.path.join(directory, "store.indexed")
+        open_one("json", lambda: Store(json_path), repeat)
+        open_one("indexed", lambda: Store(path, codec="indexed"), repeat)
+        open_one("lazy", lambda: LazyStore(path), repeat)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
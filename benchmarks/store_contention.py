@@ -0,0 +1,62 @@
+"""
+Runs writer processes incrementing their own counter in a shared store,
+reporting the time per write and the increments lost with and without
+merging.
+
+Usage: python benchmarks/store_contention.py [writers] [writes]
+"""
+import os
+import sys
+from multiprocessing import Barrier, Process
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from taktk.store import JournaledStore, Store
+
+KINDS = {
+    "store": lambda path: Store(path, check_interval=0),
+    "store, merge": lambda path: Store(path, check_interval=0, merge=True),
+    "journaled": lambda path: JournaledStore(
+        path,
+        write_delay=None,
+        check_interval=0,
+    ),
+}
+
+
+def write(kind: str, path: str, writer: int, writes: int, barrier):
+    store = KINDS[kind](path)
+    key = f"writer-{writer}"
+    barrier.wait()
+    for _ in range(writes):
+        store[key] = store.get(key, 0) + 1
+    store.flush()
+
+
+def main(writers: int = 4, writes: int = 200):
+    with TemporaryDirectory() as directory:
+        for kind in KINDS:
+            path = os.path.join(directory, kind.replace(", ", "-") + ".json")
+            KINDS[kind](path)
+            barrier = Barrier(writers)
+            processes = [
+                Process(target=write, args=(kind, path, i, writes, barrier))
+                for i in range(writers)
+            ]
+            begin = perf_counter()
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            elapsed = perf_counter() - begin
+            store = KINDS[kind](path)
+            total = sum(store.get(f"writer-{i}", 0) for i in range(writers))
+            lost = writers * writes - total
+            print(
+                f"{kind}: {elapsed / (writers * writes) * 1e6:.0f}us per"
+                f" write, {lost} of {writers * writes} writes lost"
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,84 @@
+"""
+Runs mixes of store reads and writes against every store backend, as an
+app would: reading settings and page stores, updating one key at a time
+and appending to a record collection, then reports the operations per
+second and the store's counters.
+
+Usage: python benchmarks/store_mix.py [operations] [keys]
+"""
+import os
+import sys
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from taktk.lazy_store import LazyStore
+from taktk.sqlite_store import SqliteStore
+from taktk.store import JournaledStore, Store
+
+BACKENDS = {
+    "json": lambda path: Store(path),
+    "json, write behind": lambda path: Store(path, write_delay=0.05),
+    "json, sharded": lambda path: Store(path, sharded=True),
+    "marshal": lambda path: Store(path, codec="marshal"),
+    "journaled": lambda path: JournaledStore(path, write_delay=None),
+    "sqlite": lambda path: SqliteStore(path),
+    "lazy": lambda path: LazyStore(path),
+}
+MIXES = {
+    "read heavy": 0.05,
+    "balanced": 0.5,
+    "write heavy": 0.9,
+}
+
+
+def populate(store: Store, keys: int):
+    for i in range(keys):
+        store[f"setting-{i}"] = {"value": i, "label": f"setting {i}"}
+    page = store.for_page("todos", {"entry": ""})
+    page["history"] = [f"/todos/{i}" for i in range(keys)]
+    store.collection("todos", ("uuid",))
+    store.flush()
+
+
+def run(store: Store, operations: int, writes: float, keys: int, seed=0):
+    random = Random(seed)
+    page = store.for_page("todos")
+    todos = store.collection("todos", ("uuid",))
+    for n in range(operations):
+        i = random.randrange(keys)
+        if random.random() >= writes:
+            store[f"setting-{i}"]
+            page["entry"]
+        elif n % 3 == 0:
+            todos.insert({"uuid": str(n), "desc": f"todo {n}", "done": False})
+        elif n % 3 == 1:
+            page["entry"] = f"typing {n}"
+        else:
+            store[f"setting-{i}"] = {"value": n, "label": f"setting {i}"}
+    store.flush()
+
+
+def main(operations: int = 500, keys: int = 1000):
+    with TemporaryDirectory() as directory:
+        for backend, open_store in BACKENDS.items():
+            for mix, writes in MIXES.items():
+                name = f"{backend}-{mix}".replace(" ", "-").replace(",", "")
+                path = os.path.join(directory, name)
+                populate(open_store(path), keys)
+                store = open_store(path)
+                store.stats.reset()
+                begin = perf_counter()
+                run(store, operations, writes, keys)
+                elapsed = perf_counter() - begin
+                stats = store.stats.as_dict()
+                print(
+                    f"{backend}, {mix}: {operations / elapsed:.0f} ops/s,"
+                    f" {stats['saves']} saves,"
+                    f" {stats['bytes_written'] / 1024:.0f} KiB written,"
+                    f" flush p99 {stats['flush_latency']['p99'] * 1000:.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
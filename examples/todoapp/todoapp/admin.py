@@ -14,35 +14,43 @@ DIR = Path(__file__).parent
 
 
 class Model:
+    indexes = ("uuid",)
+    # the field no two records share, records of models without one are
+    # never duplicates
+    unique = None
+
     @classmethod
     def __init_subclass__(cls):
         cls.DoesNotExist = type("DoesNotExist", (cls.DoesNotExist,), {})
         cls.DoesExist = type("DoesExist", (cls.DoesExist,), {})
 
+    @classmethod
+    def objects(cls):
+        indexes = cls.indexes
+        if cls.unique is not None:
+            indexes += (cls.unique,)
+        return store.collection(cls.field(), indexes)
+
     @classmethod
     def all(cls):
-        return list(map(cls.from_dict, store[cls.field()]))
+        return list(map(cls.from_dict, cls.objects()))
 
     @classmethod
     def create(cls, params):
-        for raw in store[cls.field()]:
-            raw = raw.copy()
-            raw.pop("uuid")
-            if raw == params:
+        objects = cls.objects()
+        if cls.unique is not None:
+            if objects.find(cls.unique, params[cls.unique]):
                 raise cls.DoesExist()
-        else:
-            params["uuid"] = str(uuid1())
-            store[cls.field()].append(params)
-            return cls.from_dict(params)
+        params["uuid"] = str(uuid1())
+        objects.insert(params)
+        return cls.from_dict(params)
 
     @classmethod
     def _from_uuid(cls, uuid):
-        uuid = str(uuid)
-        for raw in store[cls.field()]:
-            if raw["uuid"] == uuid:
-                return raw
-        else:
-            raise cls.DoesNotExist()
+        try:
+            return cls.objects().get("uuid", str(uuid))
+        except KeyError:
+            raise cls.DoesNotExist() from None
 
     @classmethod
     def from_uuid(cls, uuid):
@@ -68,20 +76,11 @@ class Model:
         except self.DoesNotExist:
             self.create(params)
         else:
-            raw.update(params)
-        finally:
-            store.save()
+            self.objects().update(raw, **params)
         return self
 
     def delete(self):
-        uuid = str(self.uuid)
-        for idx, obj in enumerate(store[self.field()]):
-            if obj["uuid"] == uuid:
-                break
-        else:
-            raise self.DoesNotExist()
-        store[self.field()].pop(idx)
-        store.save()
+        self.objects().remove(self._from_uuid(self.uuid))
         return None
 
     class Exception(ValueError):
@@ -101,6 +100,8 @@ class User(Model):
     name: str
     password: str  # Checks(le=slice(8))
     __current_user__ = None
+    indexes = ("uuid", "name")
+    unique = "name"
 
     @classmethod
     def current(cls):
@@ -110,8 +111,8 @@ class User(Model):
     @annotate
     def login(cls, name: str, password: str):
         password = sha256(password.encode()).hexdigest()
-        for raw in store[cls.field()]:
-            if raw["name"] == name and raw["password"] == password:
+        for raw in cls.objects().find("name", name):
+            if raw["password"] == password:
                 cls.__current_user__ = cls.from_dict(raw)
                 return cls.current()
         else:
@@ -147,13 +148,14 @@ class Todo(Model):
     author_id: Cast(UUID)
     desc: str
     done: bool = False
+    indexes = ("uuid", "author_id")
 
     @classmethod
     def for_user(cls, user: User):
         return list(
-            filter(
-                lambda t, u=user: t.has_user(u),
-                map(Todo.from_dict, store[cls.field()]),
+            map(
+                Todo.from_dict,
+                cls.objects().find("author_id", str(user.uuid)),
             )
         )
 
@@ -5,7 +5,6 @@ from taktk.component import Component
 from taktk.menu import Menu
 from taktk.notification import Notification
 from taktk.page import Redirect
-from taktk.writeable import NamespaceWriteable
 
 from ..admin import Todo as Todo
 from ..admin import User
@@ -17,7 +16,7 @@ class TodoPage(Component):
     r"""
     \frame padding=20
         \frame pos:grid=0,0 pos:sticky='nsew'
-            \entry width=80 pos:grid=0,0 text={{entry}} pos:sticky='nsw' bind:Key-Return={add_todo}
+            \entry width=80 pos:grid=0,0 text={entry} pos:sticky='nsw' bind:Key-Return={add_todo}
             \button text='+' command={add_todo} pos:grid=1,0 pos:sticky='nse'
         \frame pos:grid=0,1 pos:sticky='nsew'
             !enum todos:(idx, todo)
@@ -33,18 +32,12 @@ class TodoPage(Component):
 
     def init(self):
         self["todos"] = Todo.for_user(self.user)
-        NamespaceWriteable(self.namespace, "entry").subscribe(
-            self.update_entry
-        )
-
-    def update_entry(self):
-        store['entry'] = self["entry"]
 
     def close(self):
         root.destroy()
 
     def add_todo(self, *_):
-        if not self["entry"].strip():
+        if not self["entry"].get().strip():
             return Notification(
                 "Empty field",
                 "Please, enter an item",
@@ -52,8 +45,8 @@ class TodoPage(Component):
                 bootstyle="warning",
                 source="todo-empty-notification",
             ).show()
-        self["user"].create_todo(self["entry"]).save()
-        self["entry"] = ""
+        self["user"].create_todo(self["entry"].get()).save()
+        self["entry"].set("")
         self.update()
 
     def popper(self, uuid):
@@ -115,6 +108,6 @@ def default(_store, /):
         store = STORE.for_page(__name__).partition(user.name, {
             "entry": _("pages.todos.placeholder"),
         })
-        return TodoPage(user=user, entry=store['entry'])
+        return TodoPage(user=user, entry=store.writeable("entry"))
     else:
         raise Redirect("sign@signin")
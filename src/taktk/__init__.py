@@ -17,7 +17,9 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from typing import Any, Callable, Optional
 
-from pyoload import annotate
+# Keep the package's imports to the standard library, `taktk.singleton`
+# is imported by entry points before the application and it's gui
+# dependencies.
 
 _app = None
 
@@ -57,7 +59,6 @@ class NilType:
 Nil = NilType()
 
 
-@annotate
 def resolve(value: Any, callback: Optional[Callable] = None) -> Any:
     """
     basicly resolves from taktk descriptors as Media or Writeable
@@ -101,6 +102,17 @@ def notify(*args, **kw):
     notification.Notification(*args, **kw).show()
 
 
+def prefetch(*urls: str) -> int:
+    """
+    Prefetches the pages of `urls` in the running application's view, see
+    `taktk.page.PageView.prefetch`.
+    """
+    view = getattr(_app, "view", None)
+    if view is None:
+        return 0
+    return view.prefetch(urls)
+
+
 def make_menu(*args, **kw):
     from . import menu
 
@@ -109,4 +121,4 @@ def make_menu(*args, **kw):
 
 __version__ = "0.1.0a1"
 __author__ = "ken-morel"
-__all__ = ["Nil", "on_create", "notify"]
+__all__ = ["Nil", "on_create", "notify", "prefetch"]
@@ -0,0 +1,151 @@
+"""
+Asyncio integration, running coroutines from the tk mainloop.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from functools import wraps
+from inspect import iscoroutinefunction
+from logging import getLogger
+from typing import Awaitable, Callable, Optional
+
+log = getLogger(__name__)
+
+POLL_MS = 10
+
+_loop = None
+
+
+class TkLoop:
+    """
+    An asyncio event loop pumped from the tk mainloop: while it has tasks,
+    a callback scheduled with `after` every `POLL_MS` milliseconds runs
+    the loop's ready callbacks, so coroutines and their done callbacks run
+    on the tk thread.
+    """
+
+    def __init__(self, widget=None):
+        """
+        :param widget: The widget to schedule the pump on, defaults to the
+        tkinter default root.
+        """
+        self.widget = widget
+        self.loop = asyncio.new_event_loop()
+        self._after_id = None
+
+    def run(
+        self,
+        coro: Awaitable,
+        on_done: Optional[Callable] = None,
+    ) -> asyncio.Future:
+        """
+        Schedules `coro` on the loop.
+
+        :param on_done: Called with the task once done or cancelled,
+        errors are logged if not given.
+        :returns: The task running the coroutine.
+        """
+        task = asyncio.ensure_future(coro, loop=self.loop)
+        task.add_done_callback(on_done or self._log_error)
+        self._schedule(0)
+        return task
+
+    @staticmethod
+    def _log_error(task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            log.error("error in task %r", task, exc_info=task.exception())
+
+    @property
+    def pending(self) -> bool:
+        return bool(asyncio.all_tasks(self.loop))
+
+    def _schedule(self, ms: int):
+        if self._after_id is not None:
+            return
+        widget = self.widget
+        if widget is None:
+            import tkinter
+
+            widget = tkinter._get_default_root("run coroutines")
+        self._after_id = widget.after(ms, self._pump)
+
+    def _run_once(self):
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+
+    def _pump(self):
+        self._after_id = None
+        if not self.loop.is_running():
+            self._run_once()
+            if not self.pending:
+                # done callbacks of the tasks which just finished
+                self._run_once()
+        if self.pending:
+            self._schedule(POLL_MS)
+
+    def close(self):
+        """
+        Cancels the pending tasks and closes the loop.
+        """
+        if self._after_id is not None and self.widget is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+        self.loop.close()
+
+
+def get_loop(widget=None) -> TkLoop:
+    """
+    Returns the loop coroutines of the application run in.
+
+    :param widget: A widget of the application, it's root drives the loop
+    if none was set.
+    """
+    global _loop
+    if _loop is None or _loop.loop.is_closed():
+        _loop = TkLoop()
+    if widget is not None and _loop.widget is None:
+        _loop.widget = widget._root()
+    return _loop
+
+
+def run(coro: Awaitable, on_done: Optional[Callable] = None):
+    """
+    Runs `coro` in the application's loop, see `TkLoop.run`.
+    """
+    return get_loop().run(coro, on_done)
+
+
+def command(func: Callable) -> Callable:
+    """
+    Wraps a coroutine function so calling it, as a tk command or event
+    handler, schedules it in the application's loop. Other callables are
+    returned unchanged.
+    """
+    if not iscoroutinefunction(func):
+        return func
+
+    @wraps(func)
+    def run_command(*args, **kwargs):
+        return run(func(*args, **kwargs))
+
+    return run_command
@@ -27,12 +27,14 @@ from ttkbootstrap import Window
 
 from . import (
     ON_CREATE_HANDLERS,
+    aio,
     application_server,
     component,
     dictionary,
     media,
     menu,
     page,
+    singleton,
     store,
 )
 
@@ -53,8 +55,20 @@ class Application:
       creation.
     - **menu**: an optional `taktk.menu.Menu` object to use as toplevel menu
     - **layout**: an instance of `Layout` class you should define yourself
-    - **destroy_cache**: Experimental: destroys only the last {x} viewed
-      component's widget to reduce chances for app to abruptly resize
+    - **destroy_cache**: The number of history entries before and after the
+      current page kept rendered for instant back and forward navigation
+    - **navigation_trace**: The optional path of a json lines file the
+      timings of navigations are appended to
+    - **server_class**: The `taktk.application_server.ApplicationServer`
+      subclass `listen_at` starts
+    - **singleton_name**: The name of the unix socket later launches hand
+      their url to, defaults to the pages module's name
+    - **store_class**: The `taktk.store.Store` subclass the store is
+      created with, like `taktk.sqlite_store.SqliteStore`
+    - **store_sharded**: Stores the page stores and partitions in files
+      of their own, next to the store
+    - **store_write_delay**: The seconds changes to the store are held
+      before being written, None writes each change immediately
     """
 
     dictionaries: dictionary.Dictionaries = None
@@ -62,6 +76,13 @@ class Application:
     menu: Optional[menu.Menu]
     layout: Optional[component.Component]
     destroy_cache: int = 5
+    navigation_trace: Optional[str | Path] = None
+    server_class: type = application_server.ThreadingApplicationServer
+    singleton_name: Optional[str] = None
+    store_class: type = store.Store
+    store_sharded: bool = False
+    store_write_delay: Optional[float] = 0.5
+    serve_singleton: bool = False
     _store: Optional[store.Store] = None
     address: Optional[tuple[str, int]]
     icon: Optional[str | media.Image]
@@ -166,14 +187,19 @@ class Application:
         ) = self._create_params
         if isinstance(_store, store.Store):
             self._store = _store
-        elif isinstance(_store, tuple):
-            _store, default = _store
         else:
             default = {}
+            if isinstance(_store, tuple):
+                _store, default = _store
             if _store is None:
                 self._store_file = NamedTemporaryFile(delete=False)
                 _store = self._store_file.name
-            self._store = store.Store(_store, default=default)
+            self._store = self.store_class(
+                _store,
+                default=default,
+                write_delay=self.store_write_delay,
+                sharded=self.store_sharded,
+            )
         if dictionaries_path is not None:
             self.dictionaries = dictionary.Dictionaries(dictionaries_path)
             self.set_language()
@@ -220,17 +246,48 @@ class Application:
         Runs the app with the specified entry point.
         THe passed `entry` is set as first page
         """
+        import taktk
+
         self.setup_taktk()
         root = self.create()
+        taktk._app = self
         self.init()
         for handler in ON_CREATE_HANDLERS:
             handler(self)
+        self.commands = application_server.CommandQueue(self.root)
+        self.commands.start()
+        self.singleton_server = None
+        if self.serve_singleton:
+            name = self.singleton_name or self.pages.__name__
+            try:
+                self.singleton_server = singleton.serve(self, name)
+            except FileExistsError:
+                # An other launch started serving since our handoff failed.
+                for _ in range(singleton.RETRIES):
+                    if singleton.handoff(name, entry) is not None:
+                        self.commands.stop()
+                        self.root.destroy()
+                        return
+                raise
+        self.view = page.PageView(
+            root,
+            self.pages,
+            self,
+            self.destroy_cache,
+            trace=self.navigation_trace,
+        )
         if self.address is not None:
             self.listen_at(self.address)
-        self.view = page.PageView(root, self.pages, self, self.destroy_cache)
         self.view.geometry()
+        aio.get_loop(self.root)
         self.view.url(entry)
         self.root.mainloop()
+        aio.get_loop().close()
+        self.view.metrics.close()
+        if self.singleton_server is not None:
+            self.singleton_server.shutdown()
+            self.singleton_server.server_close()
+        self._store.flush()
 
     def __call__(
         self,
@@ -274,29 +331,38 @@ class Application:
 
     def listen_at(self, address: tuple[str, int]):
         """
-        starts a `taktk.application_server.ApplicationServer` at specified
-        address
+        starts a `server_class` server at specified address, requests are
+        run on the tk thread through the app's command queue
         """
-        application_server.ApplicationServer(self, address).thread_serve()
+        self.server_class(self, address).thread_serve()
 
     def redirect_to_singleton(self, url: str = "") -> bool:
         """
-        Tries to query the apps address and:
-        - if succeeds, sends a request to the instance with the passed url
-        - if fails, starts an instance of the application
+        Tries to hand the url to a running instance over it's unix socket,
+        see `taktk.singleton`, or it's http address and:
+        - if succeeds, the instance shows the passed url
+        - if fails, starts an instance of the application, listening for
+          later launches
 
         :returns: A boolean telling if the app instance was started.
         """
-        from urllib.request import urlopen
-
-        try:
-            urlopen(f"http://localhost:{self.address[1]}/!current").read()
-        except Exception:
-            self.run(url)
-            return True
-        else:
-            urlopen(f"http://localhost:{self.address[1]}/" + url.lstrip("/"))
+        name = self.singleton_name or self.pages.__name__
+        if singleton.handoff(name, url) is not None:
             return False
+        if self.address is not None:
+            from urllib.request import urlopen
+
+            try:
+                urlopen(
+                    f"http://localhost:{self.address[1]}/" + url.lstrip("/")
+                ).read()
+            except Exception:
+                pass
+            else:
+                return False
+        self.serve_singleton = True
+        self.run(url)
+        return True
 
     def get_store(self) -> store.Store:
         """
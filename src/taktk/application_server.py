@@ -1,52 +1,343 @@
 import json
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
 from http.server import HTTPServer
 from http.server import SimpleHTTPRequestHandler
-from threading import Thread
+from logging import getLogger
+from queue import Empty, Full, Queue, SimpleQueue
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread, get_ident
+from typing import Callable
 
 from . import page
 
+log = getLogger(__name__)
+
+POLL_MS = 20
+REQUEST_TIMEOUT = 30
+KEEPALIVE = 15
+MAX_QUEUED_EVENTS = 1000
+
+
+class CommandQueue:
+    """
+    Runs callables submitted from any thread on the tk thread, the queue
+    is drained every `POLL_MS` milliseconds by an `after` callback on
+    `widget`, results are delivered through futures.
+    """
+
+    def __init__(self, widget):
+        """
+        :param widget: The widget to schedule draining on, created in the
+        tk thread.
+        """
+        self.widget = widget
+        self.queue = SimpleQueue()
+        self.thread = get_ident()
+        self._after_id = None
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Queues `func(*args, **kwargs)` to run on the tk thread, it is run
+        immediately if submitted from the tk thread.
+
+        :returns: The future of the call's result.
+        """
+        future = Future()
+        if get_ident() == self.thread:
+            self._run(future, func, args, kwargs)
+        else:
+            self.queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func: Callable, *args, timeout=REQUEST_TIMEOUT, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` on the tk thread and waits for it's
+        result. A call still queued after `timeout` seconds is cancelled,
+        a call already running is waited for.
+
+        :raises concurrent.futures.TimeoutError: If the call did not
+        start in `timeout` seconds, it will not run.
+        """
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise
+        return future.result()
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.widget.after(POLL_MS, self.drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def drain(self) -> int:
+        """
+        Runs the queued calls.
+
+        :returns: The number of calls run.
+        """
+        self._after_id = None
+        ran = 0
+        while True:
+            try:
+                future, func, args, kwargs = self.queue.get_nowait()
+            except Empty:
+                break
+            ran += self._run(future, func, args, kwargs)
+        self.start()
+        return ran
+
+    @staticmethod
+    def _run(
+        future: Future,
+        func: Callable,
+        args: tuple,
+        kwargs: dict,
+    ) -> bool:
+        """
+        Runs the call unless it's future was cancelled.
+
+        :returns: If the call was run.
+        """
+        if not future.set_running_or_notify_cancel():
+            return False
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return True
+
+
+class EventStream:
+    """
+    Fans events out to the connected streaming clients, each through it's
+    own queue, a client lagging `max_queued` events behind is dropped.
+    """
+
+    def __init__(self, max_queued: int = MAX_QUEUED_EVENTS):
+        self.max_queued = max_queued
+        self.clients = set()
+        self.lock = Lock()
+
+    def connect(self) -> Queue:
+        client = Queue(self.max_queued)
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def disconnect(self, client: Queue):
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, event: dict):
+        """
+        Queues `event` for every client, can be called from any thread.
+        """
+        with self.lock:
+            clients = tuple(self.clients)
+        for client in clients:
+            try:
+                client.put_nowait(event)
+            except Full:
+                log.warning("dropping an event stream client lagging behind")
+                self.disconnect(client)
+
+    def close(self):
+        """
+        Ends the streams of all clients.
+        """
+        with self.lock:
+            clients, self.clients = self.clients, set()
+        for client in clients:
+            client.put(None)
+
 
 class ApplicationServer(HTTPServer):
     class RequestHandler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status: int, data: dict):
+            body = json.dumps(data, default=str).encode()
+            self.send_response(status)
+            self.send_header(
+                "Content-Type",
+                "application/x-json",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            return self.wfile.write(body)
+
         def do_GET(self):
+            if self.path.strip("/") == "!events":
+                return self.stream_events()
+            if self.path.strip("/") == "!stats":
+                try:
+                    stats = self.server.commands.call(self.server.stats)
+                except FutureTimeout:
+                    return self.send_json(503, {"ok": False, "status": 503})
+                return self.send_json(200, stats)
             try:
-                _, response = self.server.app.url(self.path)
-            except page.Error404:
-                self.send_response(404)
-                self.send_header(
-                    "Content-Type",
-                    "application/x-json",
-                )
-                self.end_headers()
-                return self.wfile.write(
-                    json.dumps(
-                        {
-                            "ok": False,
-                            "status": 404,
-                        }
-                    ).encode()
+                _, response = self.server.commands.call(
+                    self.server.app.url,
+                    self.path,
                 )
+            except page.Error404:
+                return self.send_json(404, {"ok": False, "status": 404})
+            except FutureTimeout:
+                return self.send_json(503, {"ok": False, "status": 503})
+            except Exception:
+                log.exception("error while serving %r", self.path)
+                return self.send_json(500, {"ok": False, "status": 500})
             else:
-                self.send_response(200)
-                self.send_header(
-                    "Content-Type",
-                    "application/x-json",
+                return self.send_json(
+                    200,
+                    response
+                    or {
+                        "ok": True,
+                        "status": 200,
+                    },
                 )
-                self.end_headers()
-                return self.wfile.write(
-                    json.dumps(
-                        response
-                        or {
-                            "ok": True,
-                            "status": 200,
-                        }
-                    ).encode()
+
+        def do_POST(self):
+            if self.path.strip("/") != "!batch":
+                return self.send_json(404, {"ok": False, "status": 404})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                urls = json.loads(self.rfile.read(length))
+                if isinstance(urls, dict):
+                    urls = urls["urls"]
+                if not isinstance(urls, list) or not all(
+                    isinstance(url, str) for url in urls
+                ):
+                    raise TypeError("urls should be a list of strings")
+            except (ValueError, KeyError, TypeError):
+                return self.send_json(400, {"ok": False, "status": 400})
+            try:
+                results = self.server.commands.call(
+                    self.server.run_batch,
+                    urls,
                 )
+            except FutureTimeout:
+                return self.send_json(503, {"ok": False, "status": 503})
+            return self.send_json(
+                200,
+                {"ok": True, "status": 200, "results": results},
+            )
 
-    def __init__(self, app, address):
+        def write_chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def stream_events(self):
+            """
+            Streams the server's events as chunked json lines until the
+            client disconnects, pinging it every `KEEPALIVE` seconds.
+            """
+            events = self.server.events
+            client = events.connect()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.close_connection = True
+            event = {"event": "hello", "url": self.server.app.view.current_url}
+            try:
+                while event is not None:
+                    line = json.dumps(event, default=str) + "\n"
+                    self.write_chunk(line.encode())
+                    try:
+                        event = client.get(timeout=KEEPALIVE)
+                    except Empty:
+                        event = {"event": "ping"}
+                self.write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                events.disconnect(client)
+
+    def __init__(self, app, address, commands: CommandQueue = None):
+        """
+        :param commands: The queue requests are run on the tk thread with,
+        defaults to the app's.
+        """
         self.app = app
+        self.commands = commands or app.commands
+        self.events = EventStream()
+        app.view.metrics.subscribe(self.on_navigation)
+        app.get_store().subscribe(self.on_store_change)
         super().__init__(address, self.RequestHandler)
 
+    def run_batch(self, urls: list[str]) -> list[dict]:
+        """
+        Navigates to each of `urls` in turn, in a single call on the tk
+        thread.
+
+        :returns: The result of each navigation.
+        """
+        results = []
+        for url in urls:
+            try:
+                _, response = self.app.url(url)
+            except page.Error404:
+                results.append({"url": url, "ok": False, "status": 404})
+            except Exception as e:
+                log.exception("error while running %r in a batch", url)
+                results.append(
+                    {"url": url, "ok": False, "status": 500, "error": repr(e)}
+                )
+            else:
+                results.append(
+                    {
+                        "url": url,
+                        "ok": True,
+                        "status": 200,
+                        "response": response,
+                    }
+                )
+        return results
+
+    def stats(self) -> dict:
+        """
+        Returns the store's counters and the navigation percentiles.
+        """
+        return {
+            "ok": True,
+            "status": 200,
+            "store": self.app.get_store().stats.as_dict(),
+            "navigation": self.app.view.metrics.summary(),
+        }
+
+    def on_navigation(self, navigation):
+        self.events.publish(
+            {
+                "event": "navigation",
+                "url": navigation.url,
+                "current": self.app.view.current_url,
+                "route": navigation.route,
+                "total": navigation.total,
+            }
+        )
+
+    def on_store_change(self, key, value):
+        """
+        Publishes the key path which changed, clients read values they are
+        allowed to through requests, a value may be large or private.
+        """
+        if self.events.clients:
+            self.events.publish({"event": "store", "key": key})
+
+    def server_close(self):
+        self.events.close()
+        self.app.view.metrics.unsubscribe(self.on_navigation)
+        self.app.get_store().unsubscribe(self.on_store_change)
+        super().server_close()
+
     def thread_serve(self):
         self.thread = Thread(
             target=self.serve_forever,
@@ -55,3 +346,12 @@ class ApplicationServer(HTTPServer):
         self.thread.start()
         # self.app.on_close(self.thread.kill)
         return self.thread
+
+
+class ThreadingApplicationServer(ThreadingMixIn, ApplicationServer):
+    """
+    Serves each client on it's own thread, so a slow client does not block
+    the others, the requests still run one at a time on the tk thread.
+    """
+
+    daemon_threads = True
@@ -17,7 +17,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from dataclasses import dataclass
+from dataclasses import MISSING, dataclass, fields
 from importlib import import_module
 from typing import Optional
 
@@ -25,8 +25,12 @@ from pyoload import *
 from pyoload import annotate
 
 from .. import Nil, resolve, template
-from ..template import Template, evaluate_literal
+from ..aio import command
+from ..metrics import phase
+from ..template import Template, attr_paths, evaluate_literal
 from ..writeable import Namespace, Writeable
+from .geometry import geometry_plan
+from .pool import get_pool, release
 
 
 class Instruction:
@@ -318,17 +322,25 @@ class _Component:
     The base component class
     """
 
-    parent = None
+    __slots__ = (
+        "children",
+        "parent",
+        "namespace",
+        "raw_attrs",
+        "attrs",
+        "container",
+        "outlet",
+        "event_binds",
+    )
     children: list
     _pos_ = None
-    container = None
-    outlet = None
     _aligner = None
+    _frozen_attrs_ = True
 
     def _init_subclass(cls):
         if not hasattr(cls, "Attrs"):
             cls.Attrs = type(cls.__name__ + ".Attrs", (), {})
-        cls.Attrs = dataclass(cls.Attrs)
+        cls.Attrs = make_attrs(cls.Attrs, cls._frozen_attrs_)
 
     __init_subclass__ = _init_subclass
 
@@ -342,6 +354,7 @@ class _Component:
         self.children = []
         self.parent = parent
         self.namespace = namespace
+        self.container = self.outlet = None
         if parent is not None:
             self.parent.children.append(self)
         self.raw_attrs = attrs
@@ -381,146 +394,99 @@ class _Component:
         self.event_binds = {}
 
     def init_geometry(self):
-        grid_params = ("sticky",)
-        pack_params = (
-            "side",
-            "anchor",
-            "expand",
-            "fill",
-            "ipadx",
-            "padx",
-            "ipady",
-            "pady",
-        )
-        if hasattr(self.attrs, "lay"):
-            lay = self.attrs.lay
-            if "w" in lay:
-                if "x" in lay["w"]:
-                    layx = resolve(lay["w"]["x"])
-                    if isinstance(layx, str):
-                        layx = dict(
-                            [
-                                tuple(map(str.strip, x.split(":", 1)))
-                                for x in layx.split(",")
-                            ]
-                        )
-                    for col, weight in layx.items():
-                        self.outlet.columnconfigure(
-                            int(col), weight=int(weight)
-                        )
-                if "y" in lay["w"]:
-                    layy = resolve(self.attrs.lay["w"]["y"])
-                    if isinstance(layy, str):
-                        layy = dict(
-                            [
-                                tuple(map(str.strip, x.split(":", 1)))
-                                for x in layy.split(",")
-                            ]
-                        )
-                    for col, weight in layy.items():
-                        self.outlet.columnconfigure(
-                            int(col), weight=int(weight)
-                        )
-
-        if hasattr(self.attrs, "pos"):
-            pos = self.attrs.pos
-            if "pack" in pos and pos["pack"]:
-                params = {k: v for k, v in pos.items() if k in pack_params}
-                if isinstance(pos["pack"], str):
-                    params["side"] = pos["pack"]
-                self.container.pack(**params)
-            elif "grid" in pos:
-                grid = {k: v for k, v in pos.items() if k in grid_params}
-                coord = resolve(pos["grid"])
-                if isinstance(coord, tuple):
-                    if len(coord) == 2:
-                        (x, y) = coord
-                        grid["column"] = x
-                        grid["row"] = y
-                    elif len(coord) == 4:
-                        (x, y, xs, ys) = coord
-                        grid["column"] = x
-                        grid["row"] = y
-                        grid["columnspan"] = xs
-                        grid["rowspan"] = ys
-                    else:
-                        raise ValueError("wrong grid tuple", coord)
-                self.container.grid(**grid)
+        with phase("geometry"):
+            geometry_plan(self).apply(self)
 
     def collect_params(self, raw_attrs: dict[str]):
-        def set_param(obj, key, value):
-            if ":" in key:
-                pre, key = key.split(":", 1)
-
+        attrs = {}
+        for path, value in attr_paths(raw_attrs):
+            obj = attrs
+            for pre in path[:-1]:
                 if pre not in obj or not isinstance(obj[pre], dict):
                     obj[pre] = {}
-                set_param(obj[pre], key, value)
-            else:
-                obj[key] = evaluate_literal(value, self.namespace)
-
-        attrs = {}
-        for key, value in raw_attrs.items():
-            set_param(attrs, key, value)
+                obj = obj[pre]
+            obj[path[-1]] = evaluate_literal(value, self.namespace)
         return attrs
 
 
+def make_attrs(Attrs: type, frozen: bool = True) -> type:
+    """
+    Makes the `Attrs` class of a component a slotted dataclass, frozen
+    unless the component assigns it's attributes after binding them.
+    Inherited `Attrs` classes are returned unchanged.
+    """
+    if "__dataclass_fields__" in vars(Attrs):
+        return Attrs
+    return dataclass(Attrs, slots=True, frozen=frozen)
+
+
 class TkComponent(_Component):
+    __slots__ = ("_params",)
     Widget = None
     _attr_ignore = ()
-    _params = None
 
     def __init_subclass__(cls):
-        cls.Attrs = dataclass(cls.Attrs)
+        cls.Attrs = make_attrs(cls.Attrs, cls._frozen_attrs_)
         same = [
-            x
-            for x in dir(cls.Attrs)
-            if not x.startswith("_") and x not in cls._attr_ignore
+            f.name
+            for f in fields(cls.Attrs)
+            if f.default is not MISSING
+            and not f.name.startswith("_")
+            and f.name not in cls._attr_ignore
         ]
         cls.conf_aliasses = {
             **dict(zip(same, same)),
         }
+        cls._conf_fields = tuple(cls.conf_aliasses.items())
         del same
 
+    def conf_params(self, callback=None) -> dict[str]:
+        """
+        Resolves the attributes passed to the widget as configuration.
+
+        :param callback: Subscribed to the writeable attributes.
+        """
+        attrs = self.attrs
+        params = {}
+        for name, alias in self._conf_fields:
+            value = getattr(attrs, name)
+            if value is not Nil:
+                params[alias] = resolve(value, callback)
+        return params
+
     def create(self, parent):
+        for _ in self.iter_create(parent):
+            pass
+
+    def iter_create(self, parent):
+        """
+        Creates the widget and it's children, yielding after each component
+        is created so the work can be split across several tk callbacks.
+        """
         super().create()
-        self._params = params = {
-            **{
-                self.conf_aliasses[k]: resolve(v)
-                for k, v in vars(self.attrs).items()
-                if k in self.conf_aliasses and v is not Nil
-            }
-        }
+        self._params = params = self.conf_params()
         self._create(parent, params)
         self.make_bindings()
         self.init_geometry()
+        yield self
         for child in self.children:
-            child.create(self.outlet)
+            yield from child.iter_create(self.outlet)
 
     def _create(self, parent, params={}):
-        self.outlet = self.container = self.Widget(parent, **params)
+        self.outlet = self.container = get_pool(parent).acquire(
+            self.Widget, parent, params
+        )
 
     def _update(self):
-        params = {
-            **{
-                self.conf_aliasses[k]: resolve(v, self.update)
-                for k, v in vars(self.attrs).items()
-                if k in self.conf_aliasses and v is not Nil
-            }
-        }
+        params = self.conf_params(self.update)
         for k, v in params.items():
             try:
-                self.container.configure(k, v)
+                self.container.configure({k: v})
             except Exception:
                 pass
 
     def update(self):
-        params = {
-            **{
-                self.conf_aliasses[k]: resolve(v, self.update)
-                for k, v in vars(self.attrs).items()
-                if k in self.conf_aliasses and v is not Nil
-            }
-        }
+        params = self.conf_params(self.update)
         if params != self._params:
             self._update()
             self._params = params
@@ -528,6 +494,15 @@ class TkComponent(_Component):
 
 
 class EnumComponent(_Component):
+    __slots__ = (
+        "parent_namespace",
+        "object",
+        "instructions",
+        "alias",
+        "render_parent",
+        "widgets",
+    )
+
     def __init__(
         self,
         object,
@@ -538,6 +513,7 @@ class EnumComponent(_Component):
     ):
         self.children = []
         self.parent = parent
+        self.container = self.outlet = None
         self.parent_namespace = namespace
         self.object = object
         self.instructions = instructions  # instructions
@@ -546,6 +522,10 @@ class EnumComponent(_Component):
             self.parent.children.append(self)
 
     def create(self, parent=None):
+        for _ in self.iter_create(parent):
+            pass
+
+    def iter_create(self, parent=None):
         parent = parent or self.parent.outlet
         self.render_parent = parent
         self.widgets = []
@@ -556,7 +536,7 @@ class EnumComponent(_Component):
             namespace[aval] = val
             for instr in self.instructions:
                 comp = instr._eval(namespace)
-                comp.create(parent)
+                yield from comp.iter_create(parent)
                 elt = comp.container
                 self.widgets.append(
                     (comp, elt),
@@ -571,11 +551,13 @@ class EnumComponent(_Component):
             pass
         for component, widget in widgets:
             component.container = component.outlet = None
-            widget.destroy()
+            release(widget)
             del widget
 
 
 class IfComponent(_Component):
+    __slots__ = ("condition", "instructions", "render_parent", "widgets")
+
     def __init__(
         self,
         condition,
@@ -585,6 +567,7 @@ class IfComponent(_Component):
     ):
         self.children = []
         self.parent = parent
+        self.container = self.outlet = None
         self.namespace = namespace
         self.condition = condition
         self.instructions = instructions  # instructions
@@ -592,6 +575,10 @@ class IfComponent(_Component):
             self.parent.children.append(self)
 
     def create(self, parent=None):
+        for _ in self.iter_create(parent):
+            pass
+
+    def iter_create(self, parent=None):
         parent = parent or self.parent.outlet
         self.render_parent = parent
         self.widgets = []
@@ -599,7 +586,7 @@ class IfComponent(_Component):
         if self.condition.get():
             for instr in self.instructions:
                 comp = instr._eval(self.namespace)
-                comp.create(parent)
+                yield from comp.iter_create(parent)
                 self.widgets.append(
                     (comp.container, comp.container),
                 )
@@ -614,7 +601,7 @@ class IfComponent(_Component):
             pass
         for component, widget in widgets:
             component.widget = None
-            widget.destroy()
+            release(widget)
             del widget
 
 
@@ -623,6 +610,8 @@ class Component(_Component):
     _instructions_: Instruction = None
     _code_: str = None
     _template_cache: tuple[Optional[str], Optional[Template]] = (None, None)
+    _render_budget_: Optional[float] = None
+    _placeholder_ = None
 
     def init(self):
         pass
@@ -652,28 +641,55 @@ class Component(_Component):
         self.namespace[item] = value
 
     def __init__(self, store=None, **params):
-        self.namespace = Namespace()
-        self.namespace.vars.update(params)
-        self.namespace.vars["store"] = store
-        for attr_name in dir(self):
-            if not attr_name.startswith("_"):
-                try:
-                    self.namespace[attr_name] = getattr(self, attr_name)
-                except AttributeError:
-                    pass
-        self.init()
-        self._component_ = self.get_template().eval(self.namespace)
+        with phase("construct"):
+            self.namespace = Namespace()
+            self.namespace.vars.update(params)
+            self.namespace.vars["store"] = store
+            for attr_name in dir(self):
+                if not attr_name.startswith("_"):
+                    try:
+                        self.namespace[attr_name] = command(
+                            getattr(self, attr_name)
+                        )
+                    except AttributeError:
+                        pass
+            self.init()
+            with phase("template"):
+                self._component_ = self.get_template().eval(self.namespace)
 
     def render(self, master):
         self._component_.create(master)
         return self.container
 
+    def render_incremental(
+        self,
+        master,
+        budget: Optional[float] = None,
+        placeholder=None,
+        on_done=None,
+    ):
+        """
+        Renders the component in chunks of at most `budget` milliseconds
+        scheduled with `after`, showing `placeholder` until done.
+
+        :returns: The started `IncrementalRender`, which can be cancelled.
+        """
+        from .incremental import DEFAULT_BUDGET, IncrementalRender
+
+        return IncrementalRender(
+            self,
+            master,
+            budget=budget or self._render_budget_ or DEFAULT_BUDGET,
+            placeholder=placeholder or self._placeholder_,
+            on_done=on_done,
+        ).start()
+
     def update(self):
-        self.namespace._watch_changes_()
+        self.namespace.watch_changes()
         self._component_.update()
 
     def expose(self, func):
-        self.namespace[func.__name__] = func
+        self.namespace[func.__name__] = command(func)
 
     @property
     def container(self):
@@ -0,0 +1,293 @@
+"""
+Widget backends, creating the widgets of components.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from itertools import count
+from typing import Any, Callable, Optional
+
+
+class Backend:
+    """
+    Creates the widgets of components, the default `TkBackend` creates
+    real tk widgets.
+    """
+
+    def create(self, Widget: type, parent, params: dict[str]):
+        """
+        Creates a widget of class `Widget` in `parent`.
+        """
+        raise NotImplementedError()
+
+
+class TkBackend(Backend):
+    def create(self, Widget: type, parent, params: dict[str]):
+        return Widget(parent, **params)
+
+
+class HeadlessBackend(Backend):
+    """
+    A pure python backend for tests and benchmarks, creates
+    `HeadlessWidget`s which record the calls which would have been made to
+    tcl in `calls`.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.pending = deque()
+        self._ids = count()
+
+    def record(self, call: str):
+        self.calls[call] += 1
+
+    def create(self, Widget: type, parent, params: dict[str]):
+        self.record("create")
+        return HeadlessWidget(self, Widget, parent, params)
+
+    def root(self) -> "HeadlessWidget":
+        """
+        Creates a toplevel widget.
+        """
+        return HeadlessWidget(self, None, None, {})
+
+    def reset(self):
+        self.calls.clear()
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    @contextmanager
+    def recording(self):
+        """
+        Context manager yielding a counter of the calls made in it's
+        block.
+        """
+        before = self.calls.copy()
+        calls = Counter()
+        try:
+            yield calls
+        finally:
+            calls.update(self.calls)
+            calls.subtract(before)
+            for call in [c for c, n in calls.items() if n == 0]:
+                del calls[call]
+
+    def schedule(self, func: Callable, args: tuple) -> str:
+        after_id = f"after#{next(self._ids)}"
+        self.pending.append((after_id, func, args))
+        return after_id
+
+    def cancel(self, after_id: str):
+        self.pending = deque(p for p in self.pending if p[0] != after_id)
+
+    def run_pending(self) -> int:
+        """
+        Runs scheduled `after` callbacks, including those they schedule.
+
+        :returns: The number of callbacks run.
+        """
+        ran = 0
+        while self.pending:
+            _, func, args = self.pending.popleft()
+            func(*args)
+            ran += 1
+        return ran
+
+
+class HeadlessWidget:
+    """
+    Records the calls made on a widget without tk, options passed to
+    configure are stored and returned by cget. Only the widget methods
+    taktk calls are implemented, others raise AttributeError instead of
+    passing unnoticed.
+    """
+
+    def __init__(self, backend: HeadlessBackend, Widget, master, options):
+        self.backend = backend
+        self.Widget = Widget
+        self.master = master
+        self.options = dict(options)
+        self.children = {}
+        self.bindings = {}
+        self.manager = ""
+        self.placement = {}
+        self.grid_options = {"column": {}, "row": {}}
+        self.exists = True
+        if master is None:
+            self._w = "."
+        else:
+            name = getattr(Widget, "__name__", "widget").lower()
+            name = f"!{name}{next(backend._ids)}"
+            self._w = master._w.rstrip(".") + "." + name
+            master.children[name] = self
+
+    def __repr__(self):
+        return f"<HeadlessWidget {self._w}>"
+
+    def __str__(self):
+        return self._w
+
+    def _root(self) -> "HeadlessWidget":
+        return self if self.master is None else self.master._root()
+
+    def configure(self, cnf: Optional[dict | str] = None, **kw):
+        self.backend.record("configure")
+        if isinstance(cnf, str):
+            return (cnf, cnf, cnf, "", self.options.get(cnf, ""))
+        self.options.update(cnf or {}, **kw)
+
+    config = configure
+
+    def cget(self, key: str) -> Any:
+        self.backend.record("cget")
+        return self.options.get(key, "")
+
+    def __getitem__(self, key: str) -> Any:
+        return self.cget(key)
+
+    def __setitem__(self, key: str, value: Any):
+        self.configure({key: value})
+
+    def _place(self, manager: str, params: dict[str]):
+        self.backend.record(manager)
+        self.manager = manager
+        self.placement = params
+
+    def grid(self, **params):
+        self._place("grid", params)
+
+    def pack(self, **params):
+        self._place("pack", params)
+
+    def place(self, **params):
+        self._place("place", params)
+
+    def _forget(self, call: str):
+        self.backend.record(call)
+        self.manager = ""
+
+    def grid_forget(self):
+        self._forget("grid_forget")
+
+    def grid_remove(self):
+        self._forget("grid_remove")
+
+    def pack_forget(self):
+        self._forget("pack_forget")
+
+    def place_forget(self):
+        self._forget("place_forget")
+
+    def _grid_configure(self, axis: str, index, options: dict):
+        self.backend.record(f"grid_{axis}configure")
+        for idx in index if isinstance(index, (tuple, list)) else (index,):
+            configured = self.grid_options[axis].setdefault(idx, {})
+            configured.update(options)
+            if not any(configured.values()):
+                del self.grid_options[axis][idx]
+
+    def grid_columnconfigure(self, index, **options):
+        self._grid_configure("column", index, options)
+
+    def grid_rowconfigure(self, index, **options):
+        self._grid_configure("row", index, options)
+
+    columnconfigure = grid_columnconfigure
+    rowconfigure = grid_rowconfigure
+
+    def grid_size(self) -> tuple[int, int]:
+        self.backend.record("grid_size")
+        size = []
+        for axis in ("column", "row"):
+            indices = list(self.grid_options[axis])
+            for child in self.children.values():
+                if child.manager == "grid":
+                    indices.append(int(child.placement.get(axis, 0)))
+            size.append(max(indices) + 1 if indices else 0)
+        return tuple(size)
+
+    def bind(self, sequence: Optional[str] = None, func=None, add=None):
+        self.backend.record("bind")
+        if sequence is None:
+            return tuple(self.bindings)
+        self.bindings[sequence] = func
+
+    def unbind(self, sequence: str, funcid=None):
+        self.backend.record("unbind")
+        self.bindings.pop(sequence, None)
+
+    def winfo_children(self) -> list:
+        self.backend.record("winfo_children")
+        return list(self.children.values())
+
+    def winfo_manager(self) -> str:
+        self.backend.record("winfo_manager")
+        return self.manager
+
+    def winfo_exists(self) -> bool:
+        self.backend.record("winfo_exists")
+        return self.exists
+
+    def destroy(self):
+        if not self.exists:
+            return
+        self.backend.record("destroy")
+        for child in list(self.children.values()):
+            child.destroy()
+        self.exists = False
+        if self.master is not None:
+            self.master.children.pop(self._w.rsplit(".", 1)[1], None)
+
+    def after(self, ms: int, func: Optional[Callable] = None, *args):
+        return self.backend.schedule(func, args)
+
+    def after_idle(self, func: Callable, *args):
+        return self.backend.schedule(func, args)
+
+    def after_cancel(self, after_id: str):
+        self.backend.cancel(after_id)
+
+    def update(self):
+        self.backend.run_pending()
+
+    update_idletasks = update
+
+    def mainloop(self):
+        self.backend.run_pending()
+
+
+_backend: Backend = TkBackend()
+
+
+def get_backend() -> Backend:
+    """
+    Returns the backend components create their widgets with.
+    """
+    return _backend
+
+
+def set_backend(backend: Backend) -> Backend:
+    """
+    Sets the backend components create their widgets with.
+
+    :returns: The previous backend.
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
@@ -5,13 +5,15 @@ from tkinter import StringVar
 from tkinter.ttk import Button, Checkbutton, Entry, Frame, Label
 from typing import Callable, Optional
 
-from ... import Nil, NilType, resolve
+from ... import Nil, NilType
 from ...media import Image
 from ...writeable import Writeable
 from .. import TkComponent, _Component
+from ..backend import get_backend
 
 
 class frame(TkComponent):
+    __slots__ = ()
     Widget = Frame
 
     class Attrs:
@@ -28,6 +30,7 @@ class frame(TkComponent):
 
 
 class label(TkComponent):
+    __slots__ = ()
     Widget = Label
 
     class Attrs:
@@ -48,6 +51,7 @@ class label(TkComponent):
 
 
 class button(TkComponent):
+    __slots__ = ()
     Widget = Button
 
     class Attrs:
@@ -69,8 +73,10 @@ class button(TkComponent):
 
 
 class entry(TkComponent):
+    __slots__ = ("textvariable",)
     Widget = Entry
     _attr_ignore = ("text",)
+    _frozen_attrs_ = False
 
     class Attrs:
         weight: dict = field(default_factory=dict)
@@ -86,16 +92,10 @@ class entry(TkComponent):
         show: str | NilType = Nil
         bind: dict = field(default_factory=dict)
 
-    def create(self, parent: "Optional[_Component]" = None):
+    def iter_create(self, parent: "Optional[_Component]" = None):
         _Component.create(self)
         parent = parent
-        params = {
-            **{
-                self.conf_aliasses[k]: resolve(v)
-                for k, v in vars(self.attrs).items()
-                if k in self.conf_aliasses and v is not Nil
-            }
-        }
+        params = self.conf_params()
         if "textvariable" not in params:
             if isinstance(self.attrs.text, Writeable):
                 self.textvariable = self.attrs.text.stringvar
@@ -106,15 +106,16 @@ class entry(TkComponent):
             self.attrs.textvariable = self.textvariable
         else:
             self.textvariable = params[textvariable]
-        self.container = self.outlet = self.Widget(
-            master=parent,
-            **params,
+        self.container = self.outlet = get_backend().create(
+            self.Widget, parent, params
         )
         self.init_geometry()
         self.make_bindings()
+        yield self
 
 
 class checkbutton(TkComponent):
+    __slots__ = ("variable",)
     Widget = Checkbutton
     _attr_ignore = ("checked",)
 
@@ -131,16 +132,10 @@ class checkbutton(TkComponent):
         variable: BooleanVar | NilType = Nil
         _ignore = ("checked",)
 
-    def create(self, parent: "Optional[_Component]" = None):
+    def iter_create(self, parent: "Optional[_Component]" = None):
         _Component.create(self)
         parent = parent
-        params = {
-            **{
-                self.conf_aliasses[k]: resolve(v)
-                for k, v in vars(self.attrs).items()
-                if k in self.conf_aliasses and v is not Nil
-            }
-        }
+        params = self.conf_params()
         if "variable" not in params:
             if isinstance(self.attrs.checked, Writeable):
                 self.variable = self.attrs.checked.booleanvar
@@ -149,10 +144,10 @@ class checkbutton(TkComponent):
             params["variable"] = self.variable
         else:
             self.variable = params["variable"]
-        self.container = self.Widget(
-            master=parent,
-            **params,
+        self.container = get_backend().create(
+            self.Widget, parent, params
         )
         self.outlet = None
         self.init_geometry()
         self.make_bindings()
+        yield self
@@ -0,0 +1,200 @@
+"""
+Geometry plans, placing component widgets from their `pos` and `lay`
+attributes.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from typing import Optional
+
+from .. import resolve
+from ..template import (
+    TemplateAttrs,
+    attr_paths,
+    derived,
+    evaluate_literal,
+    is_dynamic,
+)
+
+GRID_PARAMS = ("sticky",)
+PACK_PARAMS = (
+    "side",
+    "anchor",
+    "expand",
+    "fill",
+    "ipadx",
+    "padx",
+    "ipady",
+    "pady",
+)
+WEIGHT_METHODS = (
+    ("x", "grid_columnconfigure"),
+    ("y", "grid_rowconfigure"),
+)
+DYNAMIC = object()
+
+
+def group_weights(weights) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    """
+    Parses weights like `'0:5,1:1'` or `{0: 5, 1: 1}` into
+    `(weight, indices)` pairs, grouping indices with the same weight.
+    """
+    if isinstance(weights, str):
+        weights = dict(
+            map(str.strip, x.split(":", 1)) for x in weights.split(",")
+        )
+    groups = {}
+    for idx, weight in weights.items():
+        groups.setdefault(int(weight), []).append(int(idx))
+    return tuple((weight, tuple(idx)) for weight, idx in groups.items())
+
+
+def grid_coords(coord) -> dict[str, int]:
+    """
+    Converts a `(column, row)` or `(column, row, columnspan, rowspan)`
+    tuple to grid parameters.
+    """
+    if not isinstance(coord, tuple):
+        return {}
+    elif len(coord) == 2:
+        return dict(zip(("column", "row"), coord))
+    elif len(coord) == 4:
+        return dict(zip(("column", "row", "columnspan", "rowspan"), coord))
+    else:
+        raise ValueError("wrong grid tuple", coord)
+
+
+class GeometryPlan:
+    """
+    Geometry of a component, compiled once per template tag: the weights
+    are pre-split, the geometry manager chosen and the static parameters
+    evaluated, only expression values are read from the component when
+    applying it.
+    """
+
+    __slots__ = ("manager", "static", "dynamic", "weights")
+
+    def __init__(self, pos: dict, lay: dict):
+        """
+        :param pos: The `pos` attributes, values may be `DYNAMIC`.
+        :param lay: The `lay` attributes, values may be `DYNAMIC`.
+        """
+        self.weights = []
+        lay_weights = lay.get("w", {})
+        for axis, method in WEIGHT_METHODS:
+            if axis not in lay_weights:
+                continue
+            elif lay_weights[axis] is DYNAMIC:
+                self.weights.append((method, None, axis))
+            else:
+                self.weights.extend(
+                    (method, weight, idx)
+                    for weight, idx in group_weights(
+                        resolve(lay_weights[axis])
+                    )
+                )
+        self.static = {}
+        self.dynamic = []
+        if "pack" in pos and pos["pack"]:
+            self.manager = "pack"
+            self._add_params(pos, PACK_PARAMS)
+            if isinstance(pos["pack"], str):
+                self.static["side"] = pos["pack"]
+        elif "grid" in pos:
+            self.manager = "grid"
+            self._add_params(pos, GRID_PARAMS)
+            if pos["grid"] is DYNAMIC:
+                self.dynamic.append("grid")
+            else:
+                self.static.update(grid_coords(resolve(pos["grid"])))
+        else:
+            self.manager = None
+
+    def _add_params(self, pos: dict, names: tuple[str, ...]):
+        for name in names:
+            if name not in pos:
+                continue
+            elif pos[name] is DYNAMIC:
+                self.dynamic.append(name)
+            else:
+                self.static[name] = pos[name]
+
+    @classmethod
+    def compile(cls, raw_attrs: dict[str, str]) -> "Optional[GeometryPlan]":
+        """
+        Compiles the plan of template attributes, or returns None if `pos`
+        or `lay` are passed as a whole, which can only be planned from the
+        evaluated attributes.
+        """
+        spec = {"pos": {}, "lay": {}}
+        for path, value in attr_paths(raw_attrs):
+            if path[0] not in spec:
+                continue
+            elif path in (("pos",), ("lay",), ("lay", "w")):
+                return None
+            elif path == ("pos", "pack") and is_dynamic(value):
+                return None
+            obj = spec
+            for key in path[:-1]:
+                obj = obj.setdefault(key, {})
+            if is_dynamic(value):
+                obj[path[-1]] = DYNAMIC
+            else:
+                obj[path[-1]] = evaluate_literal(value)
+        return cls(spec["pos"], spec["lay"])
+
+    def apply(self, component):
+        """
+        Configures the weights of the component's outlet and places it's
+        container.
+        """
+        attrs = component.attrs
+        outlet = component.outlet
+        for method, weight, idx in self.weights:
+            if weight is not None:
+                getattr(outlet, method)(idx, weight=weight)
+                continue
+            for weight, idx in group_weights(resolve(attrs.lay["w"][idx])):
+                getattr(outlet, method)(idx, weight=weight)
+        if self.manager is None:
+            return
+        params = self.static
+        if self.dynamic:
+            params = params.copy()
+            for name in self.dynamic:
+                value = resolve(attrs.pos[name])
+                if name == "grid":
+                    params.update(grid_coords(value))
+                else:
+                    params[name] = value
+        getattr(component.container, self.manager)(**params)
+
+
+def geometry_plan(component) -> GeometryPlan:
+    """
+    Returns the plan compiled for the template tag of the component, or
+    one planned from it's attributes.
+    """
+    raw = component.raw_attrs
+    plan = None
+    if isinstance(raw, TemplateAttrs):
+        plan = derived(raw, "geometry", GeometryPlan.compile)
+    if plan is None:
+        attrs = component.attrs
+        plan = GeometryPlan(
+            getattr(attrs, "pos", {}),
+            getattr(attrs, "lay", {}),
+        )
+    return plan
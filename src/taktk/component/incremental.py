@@ -0,0 +1,181 @@
+"""
+Time-sliced rendering of large component trees.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from logging import getLogger
+from time import perf_counter
+from typing import Callable, Optional
+
+from ..writeable import Writeable
+from .backend import get_backend
+
+log = getLogger(__name__)
+
+DEFAULT_BUDGET = 8
+PLACEHOLDER_GRID = {"column": 0, "row": 0, "sticky": "nsew"}
+
+
+def count_nodes(component) -> int:
+    """
+    Counts the components in the tree rooted at `component`, children
+    created at render time, as `!enum` rows, are not counted.
+    """
+    return 1 + sum(map(count_nodes, getattr(component, "children", ())))
+
+
+class IncrementalRender:
+    """
+    Renders a component's tree in chunks of at most `budget` milliseconds,
+    each chunk scheduled with `after` on the master widget so the ui keeps
+    handling input and repainting while the tree is created.
+
+    The root widget is created synchronously by `start` but is not
+    placed, `placeholder` is shown in it's place until the whole subtree
+    is created, then `on_done` is called with the root widget.
+
+    `progress`(a float in [0, 1]) and `state` are writeables, layouts can
+    subscribe to them to show a skeleton.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+
+    def __init__(
+        self,
+        component,
+        master,
+        budget: float = DEFAULT_BUDGET,
+        placeholder=None,
+        on_done: Optional[Callable] = None,
+    ):
+        """
+        :param component: The `taktk.component.Component` to render.
+        :param master: The widget to render the component in.
+        :param budget: The maximum time in milliseconds spent per chunk.
+        :param placeholder: A `Component` or a callable receiving
+        the master widget and returning the widget to show while
+        rendering.
+        :param on_done: Called with the root widget once rendered.
+        """
+        self.component = component
+        self.master = master
+        self.budget = budget / 1000
+        self.placeholder = placeholder
+        self.on_done = on_done
+        self.progress = Writeable(0.0)
+        self.state = Writeable(self.PENDING)
+        self.created = 0
+        self.total = count_nodes(component._component_)
+        self._steps = None
+        self._after_id = None
+        self._placeholder_widget = None
+
+    @property
+    def done(self) -> bool:
+        return self.state.get() == self.DONE
+
+    def start(self) -> "IncrementalRender":
+        """
+        Creates the root widget, shows the placeholder and schedules the
+        rest of the tree.
+        """
+        self._steps = self.component._component_.iter_create(self.master)
+        self.state.set(self.RUNNING)
+        if self._advance(None):
+            self._show_placeholder()
+            self._schedule()
+        return self
+
+    def cancel(self) -> bool:
+        """
+        Stops rendering and destroys the partially created tree.
+
+        :returns: `False` if the render had already finished.
+        """
+        if self.state.get() in (self.DONE, self.CANCELLED):
+            return False
+        if self._after_id is not None:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
+        self._steps.close()
+        self._hide_placeholder()
+        container = self.component._component_.container
+        if container is not None:
+            container.destroy()
+        self.state.set(self.CANCELLED)
+        return True
+
+    def _schedule(self):
+        self._after_id = self.master.after(0, self._step)
+
+    def _step(self):
+        self._after_id = None
+        if self._advance(perf_counter() + self.budget):
+            self.progress.set(self.created / max(self.total, self.created))
+            self._schedule()
+
+    def _advance(self, deadline: Optional[float]) -> bool:
+        """
+        Creates components until `deadline` or, if None, a single one.
+
+        :returns: If there are components left to create.
+        """
+        try:
+            while True:
+                next(self._steps)
+                self.created += 1
+                if deadline is None or perf_counter() >= deadline:
+                    return True
+        except StopIteration:
+            self._finish()
+            return False
+
+    def _finish(self):
+        self._hide_placeholder()
+        self.progress.set(1.0)
+        self.state.set(self.DONE)
+        log.debug(
+            "incrementally rendered %d components of %r",
+            self.created,
+            self.component,
+        )
+        if self.on_done is not None:
+            self.on_done(self.component.container)
+
+    def _show_placeholder(self):
+        from . import Component
+
+        placeholder = self.placeholder
+        if isinstance(placeholder, type):
+            placeholder = placeholder()
+        if isinstance(placeholder, Component):
+            widget = placeholder.render(self.master)
+        elif placeholder is not None:
+            widget = placeholder(self.master)
+        else:
+            from tkinter.ttk import Frame
+
+            widget = get_backend().create(Frame, self.master, {})
+        widget.grid(**PLACEHOLDER_GRID)
+        self._placeholder_widget = widget
+
+    def _hide_placeholder(self):
+        if self._placeholder_widget is not None:
+            self._placeholder_widget.destroy()
+            self._placeholder_widget = None
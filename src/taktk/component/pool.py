@@ -0,0 +1,187 @@
+"""
+Recycling pool for tk widgets.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from logging import getLogger
+from tkinter import TclError
+from weakref import WeakKeyDictionary
+
+from .backend import get_backend
+
+log = getLogger(__name__)
+
+DEFAULT_CAP = 256
+STYLE_PARAMS = ("style", "bootstyle")
+FORGET = {
+    "grid": "grid_forget",
+    "pack": "pack_forget",
+    "place": "place_forget",
+}
+GRID_RESET = {"weight": 0, "minsize": 0, "pad": 0, "uniform": ""}
+
+_pools = WeakKeyDictionary()
+
+
+class WidgetPool:
+    """
+    Keeps released widgets to hand them back instead of creating new ones.
+
+    Tk widgets can not change master, so pooled widgets are keyed by
+    their class, their parent widget and their style, a released
+    widget is unmapped, unbound and reset to the options it was acquired
+    with on reuse.
+    """
+
+    def __init__(self, cap: int = DEFAULT_CAP):
+        """
+        :param cap: The maximum number of pooled widgets, extra released
+        widgets are destroyed, 0 disables pooling.
+        """
+        self.cap = cap
+        self.size = 0
+        self.widgets = {}
+        self.acquired = WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.releases = 0
+        self.discards = 0
+
+    @staticmethod
+    def key(Widget, parent, params: dict[str]) -> tuple:
+        return (Widget, parent) + tuple(params.get(p) for p in STYLE_PARAMS)
+
+    def acquire(self, Widget, parent, params: dict[str] = {}):
+        """
+        Returns a pooled widget configured with `params` or creates a new
+        one.
+        """
+        key = self.key(Widget, parent, params)
+        stack = self.widgets.get(key)
+        while stack:
+            widget, configured = stack.pop()
+            self.size -= 1
+            if widget.winfo_exists():
+                self.hits += 1
+                self._reset(widget, configured, params)
+                self.acquired[widget] = (key, frozenset(params))
+                return widget
+        self.misses += 1
+        widget = get_backend().create(Widget, parent, params)
+        self.acquired[widget] = (key, frozenset(params))
+        return widget
+
+    def release(self, widget) -> bool:
+        """
+        Gives `widget` and it's children back to the pool, or destroys them
+        if they were not acquired from it or the pool is full.
+
+        :returns: If the widget was pooled.
+        """
+        entry = self.acquired.pop(widget, None)
+        if entry is not None and self.size >= self.cap:
+            self.prune()
+        if entry is None or self.size >= self.cap:
+            if entry is not None:
+                self.discards += 1
+            widget.destroy()
+            return False
+        for child in widget.winfo_children():
+            self.release(child)
+        forget = FORGET.get(widget.winfo_manager())
+        if forget is not None:
+            getattr(widget, forget)()
+        for sequence in widget.bind():
+            widget.unbind(sequence)
+        columns, rows = widget.grid_size()
+        for index in range(columns):
+            widget.grid_columnconfigure(index, **GRID_RESET)
+        for index in range(rows):
+            widget.grid_rowconfigure(index, **GRID_RESET)
+        key, configured = entry
+        self.widgets.setdefault(key, []).append((widget, configured))
+        self.size += 1
+        self.releases += 1
+        return True
+
+    def _reset(self, widget, configured: frozenset, params: dict[str]):
+        for option in configured - params.keys():
+            try:
+                widget.configure({option: widget.configure(option)[3]})
+            except TclError:
+                log.debug("could not reset %r of %r", option, widget)
+        params = {k: v for k, v in params.items() if k not in STYLE_PARAMS}
+        if params:
+            widget.configure(**params)
+
+    def prune(self) -> int:
+        """
+        Drops the pooled widgets destroyed with their parent, they can not
+        be reused but count in the pool's size.
+
+        :returns: The number of widgets dropped.
+        """
+        dropped = 0
+        for key, stack in list(self.widgets.items()):
+            alive = [entry for entry in stack if entry[0].winfo_exists()]
+            dropped += len(stack) - len(alive)
+            if alive:
+                self.widgets[key] = alive
+            else:
+                del self.widgets[key]
+        self.size -= dropped
+        return dropped
+
+    def clear(self):
+        """
+        Destroys all pooled widgets.
+        """
+        for stack in self.widgets.values():
+            for widget, _ in stack:
+                widget.destroy()
+        self.widgets.clear()
+        self.size = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Returns the pool hit/miss statistics.
+        """
+        requests = self.hits + self.misses
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "releases": self.releases,
+            "discards": self.discards,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+
+def get_pool(widget) -> WidgetPool:
+    """
+    Returns the widget pool of `widget`'s root window.
+    """
+    root = widget._root()
+    if root not in _pools:
+        _pools[root] = WidgetPool()
+    return _pools[root]
+
+
+def release(widget) -> bool:
+    """
+    Releases `widget` in the pool of it's root window.
+    """
+    return get_pool(widget).release(widget)
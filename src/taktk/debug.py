@@ -0,0 +1,107 @@
+"""
+Debug overlays showing the internals of a running application.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from typing import Optional
+
+from .component import Component
+from .store import Store
+
+REFRESH_MS = 500
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+STORE_ROWS = (
+    ("loads", "loads"),
+    ("saves", "saves"),
+    ("decodes", "decodes"),
+    ("read", "bytes_read"),
+    ("written", "bytes_written"),
+    ("load time", "load_time"),
+    ("save time", "save_time"),
+    ("flush p50", "p50"),
+    ("flush p90", "p90"),
+    ("flush p99", "p99"),
+)
+ROW = r"""
+    \label text='{0}' pos:grid={{(0, {2})}} pos:sticky='w'
+    \label text={{{{value('{1}')}}}} pos:grid={{(1, {2})}} pos:sticky='e'"""
+
+
+class StoreOverlay(Component):
+    """
+    Shows the counters of a store's `StoreStats`, passed as `stats`.
+    """
+
+    _code_ = r"\frame padding=10 weight:x='0: 1, 1: 1'" + "".join(
+        ROW.format(title, key, idx)
+        for idx, (title, key) in enumerate(STORE_ROWS)
+    )
+
+    def init(self):
+        self["data"] = self["stats"].as_dict()
+
+    def value(self, key: str) -> str:
+        data = self["data"]
+        if key in data["flush_latency"]:
+            return f"{data['flush_latency'][key] * 1000:.1f}ms"
+        elif key.endswith("_time"):
+            return f"{data[key] * 1000:.1f}ms"
+        elif key.startswith("bytes_"):
+            return format_size(data[key])
+        return str(data[key])
+
+    def refresh(self, widget, interval: int):
+        """
+        Updates the counters every `interval` milliseconds while `widget`
+        exists.
+        """
+        if not widget.winfo_exists():
+            return
+        self["data"] = self["stats"].as_dict()
+        self.update()
+        widget.after(interval, self.refresh, widget, interval)
+
+
+def show_store_overlay(
+    store: Optional[Store] = None,
+    interval: int = REFRESH_MS,
+) -> StoreOverlay:
+    """
+    Opens a window showing the counters of `store`, the running
+    application's store by default, refreshed every `interval`
+    milliseconds.
+    """
+    from ttkbootstrap import Toplevel
+
+    import taktk
+
+    if store is None:
+        store = taktk._app.get_store()
+    window = Toplevel(title="Store")
+    window.attributes("-topmost", True)
+    overlay = StoreOverlay(stats=store.stats)
+    overlay.render(window)
+    window.after(interval, overlay.refresh, window, interval)
+    return overlay
@@ -0,0 +1,202 @@
+"""
+A `Store` memory mapping it's file and decoding each top level value, a
+partition included, on it's first access, so opening a large store only
+costs reading it's index.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import mmap
+import os
+from time import monotonic, perf_counter
+from typing import Optional
+
+from .store import (
+    CHECK_INTERVAL,
+    CODECS,
+    Codec,
+    IndexedCodec,
+    Store,
+    detect_codec,
+    write_atomic,
+)
+
+
+class LazyStore(Store):
+    """
+    A store written with the `IndexedCodec`, whose values are decoded
+    from a memory map of the file when first accessed. Values not accessed
+    are copied as is from the map when saving. A file of another codec is
+    loaded whole, and converted.
+
+    Bulk access, like iterating the store or it's values, decodes all
+    the values.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        write_delay: Optional[float] = None,
+        check_interval: float = CHECK_INTERVAL,
+        sharded: bool = False,
+        codec: str | Codec = "indexed",
+        merge: bool = False,
+    ):
+        """
+        :param codec: Ignored, lazy stores are written with the indexed
+        codec.
+        :param merge: Not supported, merging compares every value.
+        """
+        if merge:
+            raise ValueError("LazyStore does not support merging")
+        self.lazy = {}
+        super().__init__(
+            path,
+            default,
+            write_delay,
+            check_interval,
+            sharded,
+            CODECS["indexed"],
+        )
+
+    def load(self):
+        stat = self._file_stat()
+        begin = perf_counter()
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = b""
+        codec = detect_codec(data[:16], self.codec)
+        with self.lock:
+            if isinstance(codec, IndexedCodec):
+                index = codec.index(data)
+                for key, (offset, size) in index.items():
+                    dict.pop(self, key, None)
+                    self.lazy[key] = (data, offset, size)
+                read = len(data) - sum(size for _, size in index.values())
+            else:
+                self.update(codec.loads(data[:]))
+                read = len(data)
+            self.stats.loaded(perf_counter() - begin, read)
+            self._stat = stat
+            self._checked = monotonic()
+            self.file_codec = codec if data else None
+
+    def __missing__(self, key):
+        with self.lock:
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+            try:
+                data, offset, size = self.lazy.pop(key)
+            except KeyError:
+                raise KeyError(key) from None
+            value = IndexedCodec.decode(data[offset : offset + size])
+            self.stats.decoded(size)
+            dict.__setitem__(self, key, value)
+            return value
+
+    def decode_all(self):
+        """
+        Decodes the values not accessed yet.
+        """
+        with self.lock:
+            for key in list(self.lazy):
+                self.__missing__(key)
+
+    def write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        begin = perf_counter()
+        encode = IndexedCodec.encode
+        entries = [(k, encode(v)) for k, v in dict.items(self)]
+        entries.extend(
+            (key, data[offset : offset + size])
+            for key, (data, offset, size) in self.lazy.items()
+        )
+        encoded = self.codec.dumps_entries(entries)
+        write_atomic(self.path, encoded)
+        self.saved(begin, len(encoded))
+        self.dirty = False
+        self._stat = self._file_stat()
+
+    def __setitem__(self, item, value):
+        if not isinstance(item, tuple):
+            self.lazy.pop(item, None)
+        super().__setitem__(item, value)
+
+    def __delitem__(self, key):
+        if key in self.lazy:
+            self.__missing__(key)
+        super().__delitem__(key)
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or key in self.lazy
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self.lazy)
+
+    def get(self, key, default=None):
+        if key in self.lazy:
+            self.__missing__(key)
+        return super().get(key, default)
+
+    def pop(self, key, *default):
+        if key in self.lazy:
+            self.__missing__(key)
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        if key in self.lazy:
+            self.__missing__(key)
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        data = dict(*args, **kwargs)
+        for key in data:
+            self.lazy.pop(key, None)
+        super().update(data)
+
+    def __iter__(self):
+        self.decode_all()
+        return super().__iter__()
+
+    def keys(self):
+        self.decode_all()
+        return super().keys()
+
+    def values(self):
+        self.decode_all()
+        return super().values()
+
+    def items(self):
+        self.decode_all()
+        return super().items()
+
+    def copy(self) -> dict:
+        self.decode_all()
+        return dict(super().items())
+
+    def __eq__(self, other) -> bool:
+        self.decode_all()
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        self.decode_all()
+        return super().__repr__()
+
+    __hash__ = Store.__hash__
@@ -1,10 +1,11 @@
-from functools import cached_property
+from functools import cached_property, lru_cache
 from pathlib import Path
 
 import PIL.Image
 import PIL.ImageTk
 
 MEDIA_DIR = None
+MEDIA_CACHE_SIZE = 256
 
 
 def parse_media_spec(spec):
@@ -18,7 +19,7 @@ def parse_media_spec(spec):
 
 
 def parse_media_spec_props(props):
-    from .component.parser import evaluate_literal
+    from .template import evaluate_literal
 
     props = props.split(";")
     return {
@@ -28,6 +29,7 @@ def parse_media_spec_props(props):
     }
 
 
+@lru_cache(maxsize=MEDIA_CACHE_SIZE)
 def get_media(spec):
     spec, props = parse_media_spec(spec)
     assert (
@@ -48,10 +50,18 @@ def get_image(spec):
     return get_media(spec)
 
 class Resource:
-    pass
+    def decode(self):
+        """
+        Loads the resource data, safe to call outside the tk thread.
+        """
 
 
 class Image(Resource):
+    def decode(self):
+        image = self.image
+        image.load()
+        return image
+
     @cached_property
     def image(self):
         image = PIL.Image.open(self.full_path)
@@ -18,6 +18,7 @@ class Menu:
 
     def create(self):
         menubar = ttkMenu()
+        Menu.bind_hints(menubar)
         Menu.build_submenus(menubar, self.eval_structure())
         self.menu = menubar
         self.menu_structure = self.eval_structure()
@@ -39,6 +40,7 @@ class Menu:
                 menu.add_command(label=name, command=contents, underline=idx)
             elif isinstance(contents, dict):  # a submenu
                 submenu = ttkMenu(menu)
+                cls.bind_hints(submenu)
                 menu.add_cascade(menu=submenu, label=name, underline=idx)
                 cls.build_submenus(submenu, contents)
             elif isinstance(contents, Writeable):
@@ -49,11 +51,42 @@ class Menu:
                     )
             elif name == "!sep":
                 menu.add_separator()
+            elif isinstance(contents, str):  # an url
+                menu.add_command(
+                    label=name,
+                    command=cls.url_opener(contents),
+                    underline=idx,
+                )
+                menu.urls[menu.index("end")] = contents
             else:
                 raise ValueError(
                     f"wrong menu dict field: {label!r}:{contents!r}",
                 )
 
+    @staticmethod
+    def url_opener(url):
+        def open_url():
+            import taktk
+
+            taktk.get_app().url(url)
+
+        return open_url
+
+    @staticmethod
+    def bind_hints(menu):
+        """
+        Prefetches the page of url entries when they are selected.
+        """
+        import taktk
+
+        def hint(_):
+            idx = menu.index("active")
+            if idx is not None and idx in menu.urls:
+                taktk.prefetch(menu.urls[idx])
+
+        menu.urls = {}
+        menu.bind("<<MenuSelect>>", hint)
+
     def post(self, xpos, ypos):
         if self.menu_structure != self.eval_structure():
             self.create()
@@ -86,6 +119,7 @@ class Menu:
 
     def update(self):
         self.menu.delete(0, 'end')
+        self.menu.urls.clear()
         self.build_submenus(self.menu, self.eval_structure())
 
     def eval_structure(self):
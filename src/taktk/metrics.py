@@ -0,0 +1,261 @@
+"""
+Navigation timing, recording where the time of each page navigation goes.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+from collections import deque
+from contextlib import nullcontext
+from logging import getLogger
+from pathlib import Path
+from threading import local
+from time import perf_counter, time
+from typing import Callable, Iterable, Optional
+
+from .writeable import Subscribeable
+
+log = getLogger(__name__)
+
+PHASES = (
+    "resolve",
+    "handler",
+    "construct",
+    "template",
+    "render",
+    "geometry",
+    "idle",
+)
+PERCENTILES = (50, 90, 99)
+
+_null = nullcontext()
+
+
+class Running(local):
+    """
+    The navigation running in the current thread, so phases timed on
+    other threads, like page modules imported by the prefetch worker, are
+    not counted in it.
+    """
+
+    navigation = None
+
+
+_running = Running()
+
+
+class Navigation:
+    """
+    The timings of a navigation. Phases nest, as templates are evaluated
+    while constructing components, each phase only counts the time not
+    spent in nested phases so they do not overlap.
+    """
+
+    __slots__ = (
+        "url",
+        "route",
+        "started",
+        "start",
+        "phases",
+        "total",
+        "_stack",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.route = None
+        self.started = time()
+        self.start = perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.total = None
+        self._stack = []
+
+    def enter(self, name: str):
+        now = perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self.phases[outer[0]] += now - outer[1]
+        self._stack.append([name, now])
+
+    def exit(self):
+        now = perf_counter()
+        name, since = self._stack.pop()
+        self.phases[name] = self.phases.get(name, 0.0) + now - since
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def finish(self):
+        while self._stack:
+            self.exit()
+        self.total = perf_counter() - self.start
+
+    def as_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "route": self.route,
+            "time": self.started,
+            "total": self.total,
+            "phases": self.phases,
+        }
+
+
+class Phase:
+    __slots__ = ("navigation", "name")
+
+    def __init__(self, navigation: Navigation, name: str):
+        self.navigation = navigation
+        self.name = name
+
+    def __enter__(self):
+        self.navigation.enter(self.name)
+
+    def __exit__(self, *_):
+        self.navigation.exit()
+
+
+def phase(name: str):
+    """
+    Returns a context manager timing it's block as phase `name` of the
+    current navigation, or doing nothing out of navigations.
+    """
+    navigation = _running.navigation
+    if navigation is None:
+        return _null
+    return Phase(navigation, name)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    Returns the `p`th percentile of sorted `values`, by nearest rank.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+class NavigationMetrics(Subscribeable):
+    """
+    Collects the timings of a page view's navigations, keeping the last
+    `window` of each route for percentiles, publishing each to the
+    subscribers and, optionally, appending it as a json line to `trace`.
+    """
+
+    def __init__(
+        self,
+        trace: Optional[str | Path] = None,
+        window: int = 1000,
+    ):
+        """
+        :param trace: The path of the json lines trace file.
+        :param window: The number of navigations kept per route.
+        """
+        super().__init__()
+        self.window = window
+        self.routes = {}
+        self.current = None
+        self.trace = None
+        if trace is not None:
+            self.trace = open(trace, "a", encoding="utf-8")
+
+    def subscribe(self, subscriber: Callable[[Navigation], None]):
+        """
+        Subscribes to navigations, called with each finished `Navigation`.
+        """
+        super().subscribe(subscriber)
+
+    def start(self, url: str) -> Navigation:
+        """
+        Finishes the running navigation and starts timing one to `url`.
+        """
+        self.finish()
+        _running.navigation = self.current = Navigation(url)
+        return self.current
+
+    def finish(
+        self,
+        navigation: Optional[Navigation] = None,
+    ) -> Optional[Navigation]:
+        """
+        Finishes timing the running navigation and publishes it.
+
+        :param navigation: Only finish if it is this navigation.
+        """
+        if self.current is None or navigation not in (None, self.current):
+            return None
+        navigation, self.current = self.current, None
+        if _running.navigation is navigation:
+            _running.navigation = None
+        navigation.finish()
+        route = navigation.route or navigation.url
+        if route not in self.routes:
+            self.routes[route] = deque(maxlen=self.window)
+        self.routes[route].append(navigation)
+        if self.trace is not None:
+            self.trace.write(json.dumps(navigation.as_dict()) + "\n")
+            self.trace.flush()
+        for subscriber in set(self._subscribers):
+            subscriber(navigation)
+        return navigation
+
+    def wait_idle(self, widget):
+        """
+        Times the running navigation's wait for `widget` to be idle, then
+        finishes it, phases are no more recorded meanwhile.
+        """
+        navigation = self.current
+        if navigation is None:
+            return
+        navigation.enter("idle")
+        if _running.navigation is navigation:
+            _running.navigation = None
+        widget.after_idle(self.finish, navigation)
+
+    def percentiles(
+        self,
+        route: str,
+        phase: str = "total",
+        percentiles: Iterable[float] = PERCENTILES,
+    ) -> dict[str, float]:
+        """
+        Returns the percentiles of `phase`, or of the total time, of the
+        navigations to `route` in seconds.
+        """
+        if phase == "total":
+            values = [n.total for n in self.routes.get(route, ())]
+        else:
+            values = [
+                n.phases.get(phase, 0.0) for n in self.routes.get(route, ())
+            ]
+        values.sort()
+        return {f"p{p}": percentile(values, p) for p in percentiles}
+
+    def summary(self) -> dict[str, dict[str, dict[str, float]]]:
+        """
+        Returns the percentiles of the total and each phase per route.
+        """
+        return {
+            route: {
+                name: self.percentiles(route, name)
+                for name in ("total",) + PHASES
+            }
+            for route in self.routes
+        }
+
+    def close(self):
+        self.finish()
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
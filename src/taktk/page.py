@@ -1,19 +1,30 @@
-import json
+import pkgutil
 import re
 import string
+import sys
+from collections import OrderedDict
 from decimal import Decimal
+from functools import partial
 from importlib import import_module
+from inspect import isawaitable
 from logging import getLogger
+from pathlib import Path
 from tkinter import Tk, Widget
 from types import ModuleType
 from typing import Any, Optional
 from urllib.parse import parse_qsl, urlparse
 from uuid import UUID
+from weakref import WeakValueDictionary
 
 from pyoload import annotate
 
-from . import application, component
+from . import aio, application, component
 from . import store as store_
+from .component.backend import HeadlessWidget
+from .component.incremental import count_nodes
+from .metrics import NavigationMetrics, phase
+from .prefetcher import Prefetcher
+from .query import PageHandler, QueryError
 
 log = getLogger(__name__)
 
@@ -36,13 +47,17 @@ class PageView:
     destroy_cache: int
     package: ModuleType
     current_url: Optional[str]
+    loading = None
 
     def __init__(
         self,
-        parent: Tk | Widget,
+        parent: Tk | Widget | HeadlessWidget,
         page: ModuleType,
         app: "application.Application",
         destroy_cache: int = 5,
+        cache_size: int = 16,
+        cache_widgets: int = 10_000,
+        trace: Optional[str | Path] = None,
     ):
         """\
         :param parent: the parent widget to view the pages in, usually the
@@ -50,17 +65,36 @@ class PageView:
 
         :param page: The module the app will fetch pages from.
 
-        :param destroy_cache: Experimental destroy cache
+        :param destroy_cache: The number of history entries before and after
+        the current one kept rendered, so they are shown back without being
+        re-rendered.
+
+        :param cache_size: The maximum number of cached page and layout
+        component instances.
+
+        :param cache_widgets: The maximum estimated number of widgets held by
+        cached component instances.
+
+        :param trace: The path of a json lines file the timings of
+        navigations are appended to.
         """
         self.history = []
         self.current_page = None
         self.parent = parent
         self.current_widget = None
         self.app = app
-        self.store = app.store
+        self.store = app.get_store()
         self.destroy_cache = destroy_cache
+        self.cache = PageCache(cache_size, cache_widgets)
         self.package = page
         self.current_url = None
+        self.pending_render = None
+        self.pending_render_entry = None
+        self.pending_load = None
+        self.pending_load_entry = None
+        self.prefetcher = Prefetcher(self)
+        self.metrics = NavigationMetrics(trace)
+        self._routes = None
 
     def geometry(self):
         """\
@@ -78,70 +112,199 @@ class PageView:
         redirect occured
         """
         target = url
+        # !current, !back and !forward are not navigations to a route
+        timed = not url.strip("/").startswith("!")
+        if timed:
+            self.metrics.start(url)
         while True:
             try:
                 result = self.exec_url(target)
             except Redirect as r:
                 target = r.url
                 if not redirect:
+                    if timed:
+                        self.metrics.finish()
                     raise
+            except BaseException:
+                if timed:
+                    self.metrics.finish()
+                raise
             else:
+                if timed:
+                    self.metrics.wait_idle(self.parent)
                 return result
 
-    def view_component(self, components: "tuple", *, _cache={}):
-        if self.current_page is None:
-            self.current_page = 0
-        else:
-            self.current_page += 1
-        current = self.current_widget
-        self.history.insert(self.current_page, components)
+    def view_component(
+        self,
+        components: "tuple",
+        spec: "Optional[tuple]" = None,
+    ):
+        """
+        Renders the components, each in the outlet of the previous, as a
+        new history entry, dropping the entries after the current one.
+
+        :param spec: The `(module, handler, params, kwparams)` to restore
+        the entry from once it's widgets are dropped.
+        """
+        self.cancel_pending_render()
+        current = self.current_entry
+        if current is not None:
+            for entry in self.history[self.current_page + 1 :]:
+                self.drop_entry(entry)
+            del self.history[self.current_page + 1 :]
+        entry = HistoryEntry(self.current_url, spec, components, None)
+        self.render_entry(entry, components)
+        if current is not None and current.widget is not None:
+            current.widget.grid_remove()
+        self.history.append(entry)
+        self.current_page = len(self.history) - 1
+        self.current_widget = entry.widget
+        self.trim_history()
+
+    def render_entry(self, entry: "HistoryEntry", components: "tuple"):
+        """
+        Renders the components as the widget of `entry`, remembering the
+        entry if it's page is rendered incrementally, so it's reset if the
+        render is cancelled.
+
+        Component classes are replaced by instances lent by the cache,
+        each entry renders instances of it's own so they keep updating
+        their widgets while the entry is kept alive.
+        """
+        entry.components = tuple(
+            self.cache.get(c) if isinstance(c, type) else c
+            for c in components
+        )
+        entry.widget = self.render_components(entry.components)
+        if self.pending_render is not None:
+            self.pending_render_entry = entry
+
+    def render_components(self, components: "tuple"):
+        """
+        Renders the components, each in the outlet of the previous.
+
+        :returns: The container of the first component.
+        """
+        with phase("render"):
+            return self._render_components(components)
+
+    def _render_components(self, components: "tuple"):
         parent = self.parent
         master = None
-        for component in components:
+        for idx, component in enumerate(components):
             if isinstance(component, type):
-                if component not in _cache:
-                    _cache[component] = component()
-                component = _cache[component]
+                component = self.cache.get(component)
 
-            component = component
             parent.columnconfigure(0, weight=1)
             parent.rowconfigure(0, weight=1)
-            component.render(parent)
-            container = component.container
-            container.grid(column=0, row=0, sticky="nsew")
-            master = master or container
+            if (
+                idx == len(components) - 1
+                and component._render_budget_ is not None
+            ):
+                self.pending_render = component.render_incremental(
+                    parent,
+                    on_done=self._place_rendered,
+                )
+            else:
+                component.render(parent)
+                self._place_rendered(component.container)
+            master = master or component.container
             parent = component.outlet
-        self.current_widget = master
-        if current is not None:
-            self.destroy_later(master)
+        return master
+
+    def _place_rendered(self, container):
+        container.grid(column=0, row=0, sticky="nsew")
 
-    def destroy_later(self, widget, cache=[]):
-        cache.append(widget)
-        if len(cache) > self.destroy_cache:
-            cache.pop(0).destroy()
+    def cancel_pending_render(self) -> bool:
+        """
+        Cancels the incremental render of the previous page if still
+        running. It's history entry is dropped, as the partially rendered
+        page is destroyed, so it's restored from it's spec when shown again.
+
+        :returns: if a render was cancelled.
+        """
+        pending, self.pending_render = self.pending_render, None
+        entry, self.pending_render_entry = self.pending_render_entry, None
+        if pending is None or not pending.cancel():
+            return False
+        if entry is not None:
+            self.drop_entry(entry)
+        return True
+
+    @property
+    def current_entry(self) -> "Optional[HistoryEntry]":
+        if self.current_page is None:
+            return None
+        return self.history[self.current_page]
+
+    def trim_history(self):
+        """
+        Drops the widgets of the history entries further than
+        `destroy_cache` entries from the current one.
+        """
+        for idx, entry in enumerate(self.history):
+            if abs(idx - self.current_page) > self.destroy_cache:
+                self.drop_entry(entry)
+
+    def drop_entry(self, entry: "HistoryEntry"):
+        """
+        Drops the widget of `entry`, giving it's component instances back
+        to the cache once the entry only keeps it's restore spec.
+        """
+        components = entry.components
+        entry.drop()
+        if components is not None and entry.components is None:
+            for instance in components:
+                self.cache.put(instance)
 
     def back(self):
-        if self.current_page > 0:
+        if self.current_page is not None and self.current_page > 0:
             self.focus_page(self.current_page - 1)
             return True
         else:
             return False
 
     def forward(self):
-        if self.current_page < len(self.history) - 1:
+        if (
+            self.current_page is not None
+            and self.current_page < len(self.history) - 1
+        ):
             self.focus_page(self.current_page + 1)
             return True
         else:
             return False
 
     def focus_page(self, idx):
-        page = self.history[idx]
-        if self.current_widget is not None:
-            self.current_widget.destroy()
-        self.history[idx].render(self.parent)
-        self.current_widget = self.history[idx].container
-        self.current_widget.grid(column=0, row=0, sticky="nsew")
+        """
+        Shows the history entry at `idx`, re-gridding it's kept alive
+        widget or restoring it from it's spec.
+        """
+        self.cancel_pending_render()
+        self.cancel_pending_load()
+        entry = self.history[idx]
+        current = self.current_entry
+        if entry.widget is None and entry.components is None:
+            try:
+                module, layouts, page = self.load(*entry.spec)
+            except Redirect as r:
+                return self.url(r.url)
+            if isawaitable(page):
+                self.load_async(module, layouts, page, entry=entry)
+            else:
+                entry.components, _ = page_components(layouts, page)
+                if entry.components is None or entry.components[-1] is None:
+                    raise Error404(entry.url)
+        if entry.widget is None:
+            self.render_entry(entry, entry.components)
+        else:
+            self._place_rendered(entry.widget)
+        if current is not None and current is not entry:
+            if current.widget is not None:
+                current.widget.grid_remove()
         self.current_page = idx
+        self.current_widget = entry.widget
+        self.current_url = entry.url
+        self.trim_history()
 
     def exec_url(self, cmd):
         if cmd.strip("/") == "!current":
@@ -172,7 +335,7 @@ class PageView:
             )
         else:
             parsed = urlparse(cmd)
-            args = {k: json.loads(v) for k, v in parse_qsl(parsed.query)}
+            args = dict(parse_qsl(parsed.query, keep_blank_values=True))
             handler = parsed.fragment
             path = parsed.path
             if (
@@ -184,67 +347,425 @@ class PageView:
             return self(path, handler, args)
 
     def __call__(self, module, handler, params={}, /, **kwparams):
-        from .component import Component
+        self.cancel_pending_load()
+        spec = (module, handler, params, kwparams)
+        module, layouts, page = self.load(*spec)
+        if isawaitable(page):
+            return self.load_async(module, layouts, page, spec)
+        components, http = page_components(layouts, page)
+        if components is None:
+            return (None, None)
+        elif components[-1] is not None:
+            self.view_component(components, spec)
+        else:
+            components = components[:-1]
+        return (components, http)
+
+    def load(self, module, handler, params={}, kwparams={}):
+        """
+        Calls the page handler of `module`.
 
-        if isinstance(module, str):
-            module, urlparams, layouts = self.import_module(module)
+        :returns: The page module, it's layouts and the handler's return
+        value, which is awaitable for async handlers.
+        """
+        urlparams = ()
+        layouts = []
+        handler = handler or DEFAULT_HANDLER
         try:
-            function = getattr(module, handler or DEFAULT_HANDLER)
+            if isinstance(module, str):
+                with phase("resolve"):
+                    node, urlparams = self.routes.resolve_node(module)
+                    module, layouts = node.module, list(node.layouts)
+                function = node.handler(handler)
+            else:
+                function = PageHandler(getattr(module, handler))
         except AttributeError as e:
             raise Error404(e)
-        http = comp = None
-        page = function(
-            self.store,
-            *urlparams,
-            **kwparams,
+        if self.metrics.current is not None:
+            self.metrics.current.route = f"{module.__name__}@{handler}"
+        try:
+            kwargs = function.convert(params | kwparams)
+        except QueryError as e:
+            raise Error404(e) from e
+        with phase("handler"):
+            page = function.function(
+                self.store,
+                *urlparams,
+                **kwargs,
+            )
+        return (module, layouts, page)
+
+    def load_async(self, module, layouts, page, spec=None, entry=None):
+        """
+        Shows the loading placeholder of `module`, or the view's, in a new
+        history entry, or in `entry`, until the awaitable returned by an
+        async handler resolves, then shows it's page.
+
+        :returns: The placeholder components and no http response.
+        """
+        placeholder = getattr(module, "loading", self.loading) or Loading
+        if isinstance(placeholder, type):
+            placeholder = placeholder()
+        components = tuple(layouts) + (placeholder,)
+        if entry is None:
+            self.view_component(components, spec)
+            entry = self.current_entry
+        else:
+            self.render_entry(entry, components)
+        self.pending_load_entry = entry
+        self.pending_load = aio.get_loop(self.parent).run(
+            page,
+            partial(self._loaded, entry, tuple(layouts)),
         )
-        if page is None:
-            return (None, None)
-        elif isinstance(page, tuple):
-            comp, http = page
-        elif isinstance(page, Component):
-            comp = page
+        return (components, None)
+
+    def _loaded(self, entry, layouts, task):
+        if task.cancelled():
+            return
+        if self.pending_load is task:
+            self.pending_load = None
+            self.pending_load_entry = None
+        try:
+            page = task.result()
+        except Redirect as r:
+            self.url(r.url)
+            return
+        except Exception:
+            log.exception("error in async page handler of %r", entry.url)
+            return
+        components, _ = page_components(layouts, page)
+        if components is None or components[-1] is None:
+            return
+        placeholder, instances = entry.widget, entry.components
+        self.render_entry(entry, components)
+        if placeholder is not None:
+            component.release(placeholder)
+        for instance in instances or ():
+            self.cache.put(instance)
+        if entry is self.current_entry:
+            self.current_widget = entry.widget
         else:
-            http = page
-        if comp is not None:
-            layouts.append(comp)
-            self.view_component(tuple(layouts))
-        return (tuple(layouts), http)
+            entry.widget.grid_remove()
+
+    def cancel_pending_load(self) -> bool:
+        """
+        Cancels the async handler of the previous navigation if still
+        running. It's history entry, showing the loading placeholder, is
+        dropped so the handler runs again when it's shown back.
+
+        :returns: if a handler was cancelled.
+        """
+        pending, self.pending_load = self.pending_load, None
+        entry, self.pending_load_entry = self.pending_load_entry, None
+        if pending is None or not pending.cancel():
+            return False
+        if entry is not None:
+            self.drop_entry(entry)
+        return True
+
+    @property
+    def routes(self) -> "RouteTable":
+        """
+        The route table of the pages package, rebuilt when url patterns
+        were registered since it was built.
+        """
+        if self._routes is None or self._routes.version != _routes_version:
+            self._routes = RouteTable(self.package)
+        return self._routes
 
     def import_module(self, path):
-        module = self.package
+        return self.routes.resolve(path)
+
+    def prefetch(self, urls) -> int:
+        """
+        Imports the page modules of `urls`, parsing their templates and
+        decoding their media on a worker thread, so visiting them later
+        only creates widgets.
+
+        :param urls: An url or an iterable of urls.
+
+        :returns: The number of pages queued, pages are prefetched once.
+        """
+        if isinstance(urls, str):
+            urls = (urls,)
+        return self.prefetcher.request(urls)
+
+
+def page_components(layouts, page) -> tuple[Optional[tuple], Any]:
+    """
+    Splits the return value of a page handler into the layouts followed by
+    the page component, or None if it returned none, and the http response.
+    """
+    from .component import Component
+
+    http = comp = None
+    if page is None:
+        return (None, None)
+    elif isinstance(page, tuple):
+        comp, http = page
+    elif isinstance(page, Component) or (
+        isinstance(page, type) and issubclass(page, Component)
+    ):
+        comp = page
+    else:
+        http = page
+    return (tuple(layouts) + (comp,), http)
+
+
+class Loading(component.Component):
+    """
+    The default placeholder shown while an async page handler runs, page
+    modules can set their own with a `loading` component.
+    """
+
+    _code_ = r"\frame"
+
+
+class HistoryEntry:
+    """
+    A visited page, keeping it's rendered widget while it is close enough to
+    the current page, and the spec to restore it once dropped.
+    """
+
+    __slots__ = ("url", "spec", "components", "widget")
+
+    def __init__(self, url: Optional[str], spec, components: tuple, widget):
+        self.url = url
+        self.spec = spec
+        self.components = components
+        self.widget = widget
+
+    @property
+    def alive(self) -> bool:
+        return self.widget is not None
+
+    def drop(self):
+        """
+        Releases the rendered widget, keeping only the restore spec. The
+        widget may already be destroyed, by a cancelled incremental render.
+        """
+        if self.widget is not None:
+            if self.widget.winfo_exists():
+                component.release(self.widget)
+            self.widget = None
+            if self.spec is not None:
+                self.components = None
+
+
+class PageCache:
+    """
+    LRU cache of idle page and layout component instances, bounded by the
+    number of entries and an estimate of the widgets they render.
+
+    An instance is lent to one history entry at a time, as an instance
+    only updates the widgets it last rendered, and given back once the
+    entry's widgets are dropped.
+
+    A page module can opt out of caching it's components with
+    `cache = False`.
+    """
+
+    WIDGET_BYTES = 2048
+
+    def __init__(self, max_entries: int = 16, max_widgets: int = 10_000):
+        """
+        :param max_entries: The maximum number of cached instances.
+        :param max_widgets: The maximum estimated number of widgets held by
+        cached instances.
+        """
+        self.max_entries = max_entries
+        self.max_widgets = max_widgets
+        self.entries = OrderedDict()
+        self.lent = WeakValueDictionary()
+        self.widgets = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.on_evict = set()
+
+    @staticmethod
+    def cacheable(cls: type) -> bool:
+        return getattr(sys.modules.get(cls.__module__), "cache", True)
+
+    def get(self, cls: type):
+        """
+        Lends the cached instance of the component class, or creates one.
+        """
+        if cls in self.entries:
+            self.hits += 1
+            instance, widgets = self.entries.pop(cls)
+            self.widgets -= widgets
+        else:
+            self.misses += 1
+            instance = cls()
+        if self.cacheable(cls):
+            self.lent[id(instance)] = instance
+        return instance
+
+    def put(self, instance) -> bool:
+        """
+        Gives back an instance lent by `get`, to be lent again.
+
+        :returns: If the instance was cached, the cache keeps one instance
+        per class.
+        """
+        if self.lent.pop(id(instance), None) is not instance:
+            return False
+        cls = type(instance)
+        if cls in self.entries:
+            return False
+        widgets = count_nodes(instance._component_)
+        self.entries[cls] = (instance, widgets)
+        self.widgets += widgets
+        self.evict(keep=cls)
+        return True
+
+    def evict(self, keep: Optional[type] = None):
+        """
+        Evicts the least recently used instances until the cache is within
+        it's bounds, except `keep`.
+        """
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.max_entries
+            or self.widgets > self.max_widgets
+        ):
+            cls = next(iter(self.entries))
+            if cls is keep:
+                break
+            instance, widgets = self.entries.pop(cls)
+            self.widgets -= widgets
+            self.evictions += 1
+            log.debug("evicted %r holding ~%d widgets", cls, widgets)
+            for callback in set(self.on_evict):
+                callback(cls, instance)
+
+    def clear(self):
+        self.entries.clear()
+        self.widgets = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "widgets": self.widgets,
+            "memory": self.widgets * self.WIDGET_BYTES,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RouteNode:
+    """
+    A page module in the route table with it's static sub modules and
+    url pattern sub modules.
+    """
+
+    __slots__ = (
+        "name",
+        "parent",
+        "children",
+        "patterns",
+        "_module",
+        "_layouts",
+        "_handlers",
+    )
+
+    def __init__(self, name: str, parent: "Optional[RouteNode]" = None):
+        self.name = name
+        self.parent = parent
+        self.children = {}
+        self.patterns = ()
+        self._module = None
+        self._layouts = None
+        self._handlers = {}
+
+    @property
+    def module(self) -> ModuleType:
+        if self._module is None:
+            self._module = import_module(self.name)
+        return self._module
+
+    def handler(self, name: str) -> PageHandler:
+        """
+        Returns the handler `name` of the module with it's compiled query
+        converters.
+
+        :raises AttributeError: If the module has no such handler.
+        """
+        if name not in self._handlers:
+            self._handlers[name] = PageHandler(getattr(self.module, name))
+        return self._handlers[name]
+
+    @property
+    def layouts(self) -> tuple:
+        """The layouts of the module and it's parent packages."""
+        if self._layouts is None:
+            layouts = () if self.parent is None else self.parent.layouts
+            if hasattr(self.module, "layout"):
+                layouts += (self.module.layout,)
+            self._layouts = layouts
+        return self._layouts
+
+
+class RouteTable:
+    """
+    A trie of the page modules, built by scanning the pages package
+    without importing the page modules, which are imported on first
+    resolution.
+    """
+
+    def __init__(self, package: ModuleType):
+        self.version = _routes_version
+        self.root = RouteNode(package.__name__)
+        self.root._module = package
+        self._scan(self.root, getattr(package, "__path__", ()))
+
+    def _scan(self, node: RouteNode, path: list[str]):
+        for info in pkgutil.iter_modules(path):
+            child = RouteNode(node.name + "." + info.name, node)
+            node.children[info.name] = child
+            if info.ispkg:
+                spec = info.module_finder.find_spec(child.name)
+                self._scan(child, spec.submodule_search_locations)
+        node.patterns = tuple(
+            (regex, converter, node.children[name])
+            for regex, name, converter in URLPATTERNS
+            if name in node.children
+        )
+
+    def resolve(self, path: str) -> tuple[ModuleType, list, list]:
+        """
+        Resolves `path` to it's module, url parameters and layouts.
+
+        :raises Error404: If no module matches the path.
+        """
+        node, params = self.resolve_node(path)
+        return node.module, params, list(node.layouts)
+
+    def resolve_node(self, path: str) -> tuple[RouteNode, list]:
+        """
+        Resolves `path` to it's route node and url parameters.
+
+        :raises Error404: If no module matches the path.
+        """
+        node = self.root
         params = []
-        layouts = []
-        if hasattr(module, "layout"):
-            layouts.append(module.layout)
-        for package in path.strip("/").split("/"):
-            if not package.strip():
+        for segment in path.strip("/").split("/"):
+            if not segment.strip():
                 continue
-            try:
-                module = import_module(module.__package__ + "." + package)
-            except ImportError:
-                for regex, name, converter in URLPATTERNS:
-                    if match := regex.fullmatch(package):
+            child = node.children.get(segment)
+            if child is None:
+                for regex, converter, child in node.patterns:
+                    if regex.fullmatch(segment):
                         try:
-                            module = import_module(
-                                module.__package__ + "." + name
-                            )
-                        except ImportError:
-                            continue
-                        else:
-                            try:
-                                param = converter(package)
-                            except:
-                                raise Error404()
-                            else:
-                                params.append(param)
-                            break
+                            params.append(converter(segment))
+                        except Exception as e:
+                            raise Error404(path) from e
+                        break
                 else:
                     raise Error404(path)
-            if hasattr(module, "layout"):
-                layouts.append(module.layout)
-
-        return module, params, layouts
+            node = child
+        return node, params
 
 
 class Error404(ValueError):
@@ -272,6 +793,7 @@ URLPATTERNS = [
     ("uuid", UUID),
 ]
 URLPATTERNS = [(SHORTCUTS[n], n, c) for n, c in URLPATTERNS]
+_routes_version = 0
 
 
 def register_urlpattern(regex, converter=None, name=None, position=-2):
@@ -286,7 +808,9 @@ def register_urlpattern(regex, converter=None, name=None, position=-2):
                 raise ValueError(f"Unknown url shortcut: {regex!r}")
         elif not isinstance(regex, re.Pattern):
             regex = re.compile(regex)
+        global _routes_version
         URLPATTERNS.insert(position, (regex, "_" + name, func))
+        _routes_version += 1
 
     if converter is not None:
         return registerrer(converter)
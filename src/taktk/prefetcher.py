@@ -0,0 +1,151 @@
+"""
+Background prefetching of page modules, templates and media.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections import deque
+from logging import getLogger
+from threading import Lock, Thread
+from tkinter import TclError
+from types import ModuleType
+from typing import Iterable, Iterator
+from urllib.parse import urlparse
+
+from .media import Resource, get_media
+from .template import template_media
+
+log = getLogger(__name__)
+
+POLL_MS = 50
+
+
+def page_components(module: ModuleType, layouts: Iterable = ()) -> Iterator:
+    """
+    Yields the component classes defined in a page module and the classes
+    of it's layouts.
+    """
+    from .component import Component
+
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, Component):
+            yield value
+    for layout in layouts:
+        yield layout if isinstance(layout, type) else type(layout)
+
+
+class Prefetcher:
+    """
+    Imports page modules on a worker thread, which parses the templates of
+    their components, and decodes the media the templates reference, so
+    visiting the page later only creates widgets.
+
+    Tk images can only be created on the tk thread, decoded media are
+    handed back and converted from an `after` poll on the view's parent.
+    """
+
+    def __init__(self, view):
+        """
+        :param view: The `taktk.page.PageView` to prefetch pages of.
+        """
+        self.view = view
+        self.pending = deque()
+        self.ready = deque()
+        self.prefetched = set()
+        self.lock = Lock()
+        self.thread = None
+        self._poll_id = None
+
+    @staticmethod
+    def page_path(url: str) -> str:
+        path = urlparse(url).path
+        if "@" in path:
+            path = path.rsplit("@", 1)[0]
+        return "/" + path.strip("/")
+
+    def request(self, urls: Iterable[str]) -> int:
+        """
+        Queues the pages of `urls` which were not yet prefetched.
+
+        :returns: The number of queued pages.
+        """
+        queued = 0
+        with self.lock:
+            for url in urls:
+                if "://" in url or url.strip("/").startswith("!"):
+                    continue
+                path = self.page_path(url)
+                if path in self.prefetched:
+                    continue
+                self.prefetched.add(path)
+                self.pending.append(path)
+                queued += 1
+            if queued and self.thread is None:
+                self.thread = Thread(
+                    target=self._work,
+                    name="taktk-prefetch",
+                    daemon=True,
+                )
+                self.thread.start()
+        if queued and self._poll_id is None:
+            self._schedule()
+        return queued
+
+    def _work(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+                path = self.pending.popleft()
+            try:
+                self.ready.extend(self.prefetch(path))
+            except Exception:
+                log.debug("could not prefetch %r", path, exc_info=True)
+
+    def prefetch(self, path: str) -> list[Resource]:
+        """
+        Imports the page module of `path` and decodes the media of it's
+        components, call it outside the tk thread.
+
+        :returns: The decoded media resources.
+        """
+        module, _, layouts = self.view.routes.resolve(path)
+        resources = []
+        for cls in page_components(module, layouts):
+            for spec in template_media(cls.get_template().root):
+                resource = get_media(spec)
+                resource.decode()
+                resources.append(resource)
+        log.debug("prefetched %r with %d media", path, len(resources))
+        return resources
+
+    def _schedule(self):
+        self._poll_id = self.view.parent.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while self.ready:
+            resource = self.ready.popleft()
+            try:
+                resource.get()
+            except (TclError, RuntimeError):
+                log.debug("could not load %r", resource, exc_info=True)
+        if self.thread is not None or self.ready:
+            self._schedule()
+
+    @property
+    def busy(self) -> bool:
+        return self.thread is not None or bool(self.ready)
@@ -0,0 +1,204 @@
+"""
+Typed url query parameters, converted by the annotations of page handlers.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+from enum import Enum
+from inspect import Parameter, signature
+from types import NoneType, UnionType
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+Converter = Callable[[str], Any]
+
+TRUE = frozenset(("1", "true", "yes", "on"))
+FALSE = frozenset(("0", "false", "no", "off", ""))
+NONE = frozenset(("", "null", "None"))
+SEQUENCES = (list, tuple, set, frozenset)
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_bool(value: str) -> bool:
+    lower = value.lower()
+    if lower in TRUE:
+        return True
+    elif lower in FALSE:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def optional(convert: Optional[Converter]) -> Converter:
+    def convert_optional(value: str):
+        if value in NONE:
+            return None
+        return value if convert is None else convert(value)
+
+    return convert_optional
+
+
+def first_of(converters: list[Optional[Converter]]) -> Converter:
+    def convert_union(value: str):
+        for convert in converters:
+            if convert is None:
+                return value
+            try:
+                return convert(value)
+            except Exception:
+                continue
+        raise ValueError(f"no type of the union accepts {value!r}")
+
+    return convert_union
+
+
+def sequence_of(kind: type, convert: Optional[Converter]) -> Converter:
+    def convert_sequence(value: str):
+        items = value.split(",") if value else ()
+        if convert is None:
+            return kind(items)
+        return kind(map(convert, items))
+
+    return convert_sequence
+
+
+def enum_of(kind: type[Enum]) -> Converter:
+    def convert_enum(value: str):
+        for member in kind:
+            if str(member.value) == value:
+                return member
+        return kind[value]
+
+    return convert_enum
+
+
+def json_of(kind: type) -> Converter:
+    def convert_json(value: str):
+        value = json.loads(value)
+        if not isinstance(value, kind):
+            raise TypeError(f"expected {kind.__name__}, got {value!r}")
+        return value
+
+    return convert_json
+
+
+def converter(annotation) -> Optional[Converter]:
+    """
+    Compiles the converter of query strings to `annotation`, None if the
+    string is passed as is.
+
+    :raises TypeError: If the annotation is not supported.
+    """
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if annotation in (Parameter.empty, Any, str):
+        return None
+    elif origin in (Union, UnionType):
+        types = [arg for arg in args if arg is not NoneType]
+        if len(types) == 1:
+            convert = converter(types[0])
+        else:
+            convert = first_of([converter(arg) for arg in types])
+        if len(types) < len(args):
+            return optional(convert)
+        return convert
+    elif annotation is bool:
+        return parse_bool
+    elif origin in SEQUENCES or annotation in SEQUENCES:
+        item = converter(args[0]) if args else None
+        return sequence_of(origin or annotation, item)
+    elif origin is dict or annotation is dict:
+        return json_of(dict)
+    elif isinstance(annotation, type) and issubclass(annotation, Enum):
+        return enum_of(annotation)
+    elif isinstance(annotation, type):
+        return annotation
+    raise TypeError(f"unsupported query parameter type {annotation!r}")
+
+
+class PageHandler:
+    """
+    A page handler with the converters of it's keyword parameters,
+    compiled from their annotations, or the type of their default value,
+    unannotated parameters, or of unsupported types, receive the query
+    strings.
+
+    The first parameter, which receives the store, is not converted.
+    """
+
+    __slots__ = ("function", "converters", "var_keyword")
+
+    def __init__(self, function: Callable):
+        self.function = function
+        self.converters = {}
+        self.var_keyword = False
+        try:
+            hints = get_type_hints(function)
+        except Exception:
+            hints = {}
+        parameters = list(signature(function).parameters.values())[1:]
+        for param in parameters:
+            if param.kind is Parameter.VAR_KEYWORD:
+                self.var_keyword = True
+            elif param.kind in (
+                Parameter.POSITIONAL_OR_KEYWORD,
+                Parameter.KEYWORD_ONLY,
+            ):
+                annotation = hints.get(param.name, param.annotation)
+                if annotation is Parameter.empty and param.default not in (
+                    Parameter.empty,
+                    None,
+                ):
+                    annotation = type(param.default)
+                try:
+                    self.converters[param.name] = converter(annotation)
+                except TypeError:
+                    self.converters[param.name] = None
+
+    def convert(self, query: dict[str]) -> dict[str]:
+        """
+        Converts the string values of `query`, other values are passed
+        as is.
+
+        :raises QueryError: If a value could not be converted or the
+        handler does not take the parameter.
+        """
+        kwargs = {}
+        for name, value in query.items():
+            if name in self.converters:
+                convert = self.converters[name]
+            elif self.var_keyword:
+                convert = None
+            else:
+                raise QueryError(f"unexpected query parameter {name!r}")
+            if convert is not None and isinstance(value, str):
+                try:
+                    value = convert(value)
+                except Exception as e:
+                    raise QueryError(
+                        f"wrong value for query parameter {name!r}: {value!r}"
+                    ) from e
+            kwargs[name] = value
+        return kwargs
@@ -8,7 +8,7 @@ import pygments
 from pyoload import annotate
 from ttkbootstrap import Frame, Scrollbar, Text
 
-from . import Nil, NilType, dictionary, resolve
+from . import Nil, NilType, dictionary, prefetch, resolve
 from .component import _Component
 from .component.builtin import TkComponent
 from .writeable import Expression
@@ -362,6 +362,7 @@ class SdownViewer(TkComponent):
         "text",
         "scrollable",
         "onlink",
+        "onlinkhover",
         "onbutton",
         "button_class",
     )
@@ -414,6 +415,7 @@ class SdownViewer(TkComponent):
         relief: str | NilType = Nil
         scrollable: bool = True
         onlink: Expression | Callable = lambda link: None
+        onlinkhover: Expression | Callable = prefetch
         onbutton: Expression | Callable = lambda link: None
         button_class: Expression | Callable | type(Nil) = Nil
 
@@ -428,13 +430,7 @@ class SdownViewer(TkComponent):
         self.container.columnconfigure(0, weight=1)
         self.container.columnconfigure(0, weight=1)
         self.container.rowconfigure(0, weight=1)
-        params = {
-            **{
-                self.conf_aliasses[k]: resolve(v)
-                for k, v in vars(self.attrs).items()
-                if k in self.conf_aliasses and v is not Nil
-            }
-        }
+        params = self.conf_params()
         self.widget = Text(self.container, **params)
         if self.attrs.scrollable:
             self.scrollbar = Scrollbar(self.container)
@@ -461,6 +457,7 @@ class SdownViewer(TkComponent):
         self.links.append(url)
         idx = len(self.links) - 1
         self.widget.tag_bind(f"link_{idx}", "<1>", self.link_opener(url))
+        self.widget.tag_bind(f"link_{idx}", "<Enter>", self.link_hinter(url))
         return idx
 
     def link_opener(self, link):
@@ -469,6 +466,12 @@ class SdownViewer(TkComponent):
 
         return open_link
 
+    def link_hinter(self, link):
+        def hint_link(*_):
+            resolve(self.attrs.onlinkhover)(link)
+
+        return hint_link
+
     def commander(self, name):
         def run_command(*_):
             resolve(self.attrs.onbutton)(name)
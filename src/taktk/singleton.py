@@ -0,0 +1,193 @@
+"""
+Single instance handoff over a unix socket.
+
+A running application listens on a unix socket, a second launch sends it
+the url to show and exits. The client side only imports the standard
+library so an app's entry point can try the handoff before importing the
+application and it's gui dependencies::
+
+    from taktk import singleton
+
+    if singleton.handoff("todoapp", sys.argv[1]) is None:
+        from todoapp import app
+
+        app.run(sys.argv[1])
+
+Messages are json objects framed by their 4 bytes big endian length.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import errno
+import json
+import os
+import socket
+import struct
+import tempfile
+from typing import Optional
+
+HEADER = struct.Struct(">I")
+MAX_MESSAGE = 1 << 20
+TIMEOUT = 1.0
+RETRIES = 3
+
+supported = hasattr(socket, "AF_UNIX")
+
+
+def socket_path(name: str) -> str:
+    """
+    Returns the socket path of the application `name` for the current
+    user.
+    """
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return os.path.join(directory, f"taktk-{name}-{user}.sock")
+
+
+def send_message(sock: socket.socket, message: dict):
+    data = json.dumps(message, default=str).encode()
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed in a message")
+        data += chunk
+    return data
+
+
+def recv_message(sock: socket.socket) -> dict:
+    (size,) = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    if size > MAX_MESSAGE:
+        raise ValueError(f"message of {size} bytes is too large")
+    return json.loads(recv_exactly(sock, size))
+
+
+def handoff(
+    name: str,
+    url: str = "",
+    wait: bool = False,
+    timeout: float = TIMEOUT,
+) -> Optional[dict]:
+    """
+    Sends `url` to the running instance of the application `name`.
+
+    :param wait: Waits for the instance to have shown the url, and returns
+    it's response, instead of it's acknowledgement of the url. The url is
+    shown when the instance's command queue is next drained, up to
+    `taktk.application_server.POLL_MS` milliseconds later.
+
+    :returns: The instance's reply, or None if no instance is running or
+    it did not reply in `timeout` seconds.
+    """
+    if not supported:
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path(name))
+        send_message(sock, {"url": url, "wait": wait})
+        return recv_message(sock)
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def serve(app, name: str):
+    """
+    Starts a `SingletonServer` for `app` on a daemon thread.
+
+    :returns: The server, or None if unix sockets are not supported.
+    """
+    from threading import Thread
+
+    if not supported:
+        return None
+    server = SingletonServer(app, socket_path(name))
+    server.thread = Thread(target=server.serve_forever, daemon=True)
+    server.thread.start()
+    return server
+
+
+if supported:
+    from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+
+    class SingletonServer(ThreadingUnixStreamServer):
+        """
+        Receives the urls of later launches and shows them, through the
+        app's command queue, on the tk thread.
+        """
+
+        daemon_threads = True
+
+        class RequestHandler(StreamRequestHandler):
+            def handle(self):
+                app = self.server.app
+                try:
+                    message = recv_message(self.connection)
+                except (ValueError, ConnectionError):
+                    return
+                future = app.commands.submit(app.url, message.get("url", ""))
+                if not message.get("wait"):
+                    return send_message(self.connection, {"ok": True})
+                try:
+                    _, response = future.result(self.server.response_timeout)
+                except Exception as e:
+                    response = {"ok": False, "error": repr(e)}
+                send_message(self.connection, response or {"ok": True})
+
+        def __init__(self, app, path: str, response_timeout: float = 30):
+            """
+            :param path: The socket path, a stale socket left by a crashed
+            instance is replaced.
+            :raises FileExistsError: If an instance listens at `path`.
+            :param response_timeout: The seconds waiting clients wait for
+            the url to be shown.
+            """
+            self.app = app
+            self.path = path
+            self.response_timeout = response_timeout
+            if os.path.exists(path):
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(path)
+                except ConnectionRefusedError:
+                    os.unlink(path)
+                else:
+                    raise FileExistsError(
+                        f"an instance is already listening at {path}"
+                    )
+                finally:
+                    probe.close()
+            try:
+                super().__init__(path, self.RequestHandler)
+            except OSError as e:
+                if e.errno != errno.EADDRINUSE:
+                    raise
+                raise FileExistsError(
+                    f"an instance started listening at {path}"
+                ) from e
+            os.chmod(path, 0o600)
+
+        def server_close(self):
+            super().server_close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,658 @@
+"""
+A `Store` kept in an sqlite database, each key of the store and of it's
+partitions is a row, so reading or writing a key costs a b-tree lookup
+instead of a parse or rewrite of the whole store. The records of
+collections are rows of their own, read when the collection is first
+accessed, and written one by one.
+
+The database is opened in WAL mode, changes are committed in one
+transaction per flush, batched with a `write_delay` like the json store,
+or grouped explicitly with `SqliteStore.transaction`.
+
+Copyright (C) 2024  ken-morel
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from logging import getLogger
+from time import monotonic, perf_counter
+from typing import Optional
+
+from .store import (
+    CHECK_INTERVAL,
+    Collection,
+    Pagestore,
+    Store,
+    StorePartition,
+    _unflushed,
+    detect_codec,
+    get_path,
+    set_path,
+)
+
+log = getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID
+"""
+RECORD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS record (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (scope, key, id)
+) WITHOUT ROWID
+"""
+
+
+class SqliteStore(Store):
+    """
+    A store persisted in the sqlite database at `path`, the top level keys
+    are rows of the scope `""`, the keys of each partition rows of the
+    partition's scope. Only the changed keys are written on flush, keys
+    changed in place, like appending to a list, are written by `save()`
+    or by setting them again.
+
+    The records of a `collection` are rows of the `record` table, only the
+    records inserted, updated or removed through the collection are
+    written. A list saved at the key before it was opened as a collection
+    is moved to records, and a `Store` file found at `path` is imported,
+    the file is kept as `<path>.imported`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        write_delay: Optional[float] = None,
+        check_interval: float = CHECK_INTERVAL,
+        sharded: bool = False,
+    ):
+        """
+        :param path: The path to the database file.
+        :param write_delay: The seconds changes are batched before being
+        committed, None commits each change.
+        :param sharded: Ignored, partitions are always written
+        independently, as the rows of their scope.
+        """
+        self.db = None
+        self.scope = ""
+        self.scopes = {"": self}
+        self.pending = set()
+        self.pending_records = {}
+        self.rewrite = set()
+        self.depth = 0
+        super().__init__(path, default, write_delay, check_interval)
+        with self.lock:
+            missing = [
+                key
+                for key in default
+                if key not in self and key not in self.collections
+            ]
+            for key in missing:
+                dict.__setitem__(self, key, default[key])
+        if missing:
+            self.mark("", *missing)
+
+    def connection(self) -> sqlite3.Connection:
+        if self.db is None:
+            self.db = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(SCHEMA)
+            self.db.execute(RECORD_SCHEMA)
+        return self.db
+
+    def close(self):
+        """
+        Commits the pending changes and closes the database.
+        """
+        with self.lock:
+            if self.db is not None:
+                self.flush()
+                self.db.close()
+                self.db = None
+
+    def _file_stat(self) -> Optional[int]:
+        if self.db is None:
+            return None
+        # changes on commits by other connections only
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def read(self, scope: str) -> dict:
+        """
+        Returns the keys and values of `scope` in the database.
+        """
+        begin = perf_counter()
+        rows = self.connection().execute(
+            "SELECT key, value FROM store WHERE scope = ?",
+            (scope,),
+        ).fetchall()
+        data = {key: json.loads(value) for key, value in rows}
+        self.stats.loaded(
+            perf_counter() - begin,
+            sum(len(value) for _, value in rows),
+        )
+        return data
+
+    def read_records(self, scope: str, key: str) -> list[tuple[int, dict]]:
+        """
+        Returns the ids and records of the collection at `key` of `scope`
+        in the database, in the order they were inserted.
+        """
+        begin = perf_counter()
+        rows = self.connection().execute(
+            "SELECT id, value FROM record WHERE scope = ? AND key = ?"
+            " ORDER BY id",
+            (scope, key),
+        ).fetchall()
+        records = [(id, json.loads(value)) for id, value in rows]
+        self.stats.loaded(
+            perf_counter() - begin,
+            sum(len(value) for _, value in rows),
+        )
+        return records
+
+    def reset_collections(self, mapping):
+        """
+        Opens the collections of `mapping` saved as records, and has the
+        opened ones read again on their next access.
+        """
+        keys = self.connection().execute(
+            "SELECT DISTINCT key FROM record WHERE scope = ?",
+            (mapping.scope,),
+        )
+        for (key,) in keys:
+            if key not in mapping.collections:
+                mapping.collections[key] = mapping.new_collection(key)
+        for collection in mapping.collections.values():
+            collection._records = None
+
+    def load(self):
+        """
+        Reloads the store and it's partitions from the database.
+        """
+        with self.lock:
+            try:
+                for scope, mapping in self.scopes.items():
+                    data = self.read(scope)
+                    dict.clear(mapping)
+                    dict.update(mapping, data)
+                    self.reset_collections(mapping)
+                self._stat = self._file_stat()
+            except sqlite3.DatabaseError:
+                self.db.close()
+                self.db = None
+                data = self.read_store_file()
+                if data is None:
+                    raise
+                self.import_store(data)
+            self._checked = monotonic()
+
+    def read_store_file(self) -> Optional[dict]:
+        """
+        Returns the data of the `Store` file at `path`, or None if it is
+        not one.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            data = detect_codec(raw).loads(raw)
+        except Exception:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def import_store(self, data: dict):
+        """
+        Moves the `Store` file at `path` to `<path>.imported` and writes
+        `data`, it's content, to a new database in it's place.
+        """
+        imported = self.path + ".imported"
+        log.info("importing Store %s, moved to %s", self.path, imported)
+        os.replace(self.path, imported)
+        dict.clear(self)
+        dict.update(self, data)
+        self.save()
+
+    def mark(self, scope: str, *keys):
+        """
+        Marks the `keys` of `scope` changed, and commits them or schedules
+        the commit.
+        """
+        with self.lock:
+            self.pending.update((scope, key) for key in keys)
+        self._mark_changed()
+
+    def mark_record(self, scope: str, key: str, id: int, record=None):
+        """
+        Marks the record `id` of the collection at `key` of `scope` changed
+        to `record`, or removed if None, and commits it or schedules the
+        commit.
+        """
+        with self.lock:
+            self.pending_records[scope, key, id] = record
+        self._mark_changed()
+
+    def _mark_changed(self):
+        with self.lock:
+            self.touched()
+            if self.depth:
+                self.dirty = True
+                return
+        if self.write_delay is None:
+            self.commit()
+        else:
+            self._schedule_flush()
+
+    def mark_item(self, mapping, item):
+        """
+        Marks the key of `item`, a key or key path, of `mapping` changed,
+        or only the record the path is in if it is in a record of one of
+        it's collections.
+        """
+        if not isinstance(item, tuple):
+            return self.mark(mapping.scope, item)
+        collection = mapping.collections.get(item[0])
+        if (
+            len(item) < 3
+            or collection is None
+            or not collection.loaded
+            or not collection.mark(item[1])
+        ):
+            self.mark(mapping.scope, item[0])
+
+    def changed(self, key=None, value=None):
+        if key is None:
+            return self.save()
+        self.mark_item(self, key)
+
+    def commit(self):
+        """
+        Writes the pending keys in a single transaction.
+        """
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.pending or self.rewrite or self.pending_records:
+                begin = perf_counter()
+                db = self.connection()
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    for scope in self.rewrite:
+                        db.execute(
+                            "DELETE FROM store WHERE scope = ?",
+                            (scope,),
+                        )
+                        self.pending.update(
+                            (scope, key) for key in self.scopes[scope]
+                        )
+                    upserts = []
+                    deletes = []
+                    for scope, key in self.pending:
+                        mapping = self.scopes.get(scope)
+                        if mapping is None:
+                            deletes.append((scope, key))
+                            continue
+                        collection = mapping.collections.get(key)
+                        if collection is not None and collection.loaded:
+                            # set at the collection's key, saved as records
+                            collection._rewrite(dict.get(mapping, key, []))
+                            deletes.append((scope, key))
+                        elif dict.__contains__(mapping, key):
+                            value = json.dumps(dict.__getitem__(mapping, key))
+                            upserts.append((scope, key, value))
+                        else:
+                            deletes.append((scope, key))
+                    db.executemany(
+                        "INSERT OR REPLACE INTO store VALUES (?, ?, ?)",
+                        upserts,
+                    )
+                    db.executemany(
+                        "DELETE FROM store WHERE scope = ? AND key = ?",
+                        deletes,
+                    )
+                    records = []
+                    removed = []
+                    for row, record in self.pending_records.items():
+                        if record is None:
+                            removed.append(row)
+                        else:
+                            records.append((*row, json.dumps(record)))
+                    db.executemany(
+                        "INSERT OR REPLACE INTO record VALUES (?, ?, ?, ?)",
+                        records,
+                    )
+                    db.executemany(
+                        "DELETE FROM record"
+                        " WHERE scope = ? AND key = ? AND id = ?",
+                        removed,
+                    )
+                    db.execute("COMMIT")
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+                self.saved(
+                    begin,
+                    sum(len(row[-1]) for row in upserts + records),
+                )
+                self.pending.clear()
+                self.pending_records.clear()
+                self.rewrite.clear()
+            self.dirty = False
+            self._stat = self._file_stat()
+        _unflushed.discard(self)
+
+    def save(self, scope: str = ""):
+        """
+        Rewrites all the keys of `scope`, the top level keys by default.
+        """
+        with self.lock:
+            self.touched()
+            self.rewrite.add(scope)
+            if self.depth:
+                self.dirty = True
+                return
+            self.commit()
+
+    def flush(self):
+        try:
+            if self.dirty and not self.depth:
+                self.commit()
+        except Exception as e:
+            log.error("while flushing Store %s: %s", self.path, e)
+            raise
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager grouping the changes made in it's block into a
+        single commit, other threads wait for the block to finish. If it
+        raises, the changes are discarded and the store reloaded.
+        """
+        with self.lock:
+            self.depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.depth -= 1
+                if not self.depth:
+                    self.pending.clear()
+                    self.pending_records.clear()
+                    self.rewrite.clear()
+                    self.dirty = False
+                    self.load()
+                raise
+            self.depth -= 1
+            if not self.depth:
+                self.commit()
+
+    def __getitem__(self, item):
+        key = item[0] if isinstance(item, tuple) else item
+        if key in self.collections:
+            self.collections[key].records
+        return super().__getitem__(item)
+
+    def __delitem__(self, key):
+        with self.lock:
+            dict.__delitem__(self, key)
+        self.mark("", key)
+        self.notify(key, None)
+
+    def refresh(self) -> bool:
+        if self.depth or not super().refresh():
+            return False
+        for mapping in list(self.scopes.values()):
+            if mapping is not self:
+                mapping.watch_writeables()
+        return True
+
+    def for_page(self, page, default={}):
+        if page not in self.page_stores:
+            self.page_stores[page] = SqlitePagestore(self, page, default)
+        return self.page_stores[page]
+
+    def partition(self, name, default={}):
+        if name not in self.partitions:
+            self.partitions[name] = SqlitePartition(self, name, default)
+        return self.partitions[name]
+
+    def new_collection(self, name):
+        return SqliteCollection(self, name)
+
+
+class SqlitePartition(StorePartition):
+    """
+    A partition of a `SqliteStore`, stored as the rows of it's own scope.
+    """
+
+    def __init__(self, store, name, default={}):
+        self.store = store
+        self.root = getattr(store, "root", store)
+        self.lock = store.lock
+        self.page_stores = {}
+        self.partitions = {}
+        self.collections = {}
+        self.writeables = {}
+        self.listeners = set()
+        self.name = self.FORMAT.format(name)
+        if store.scope:
+            self.scope = store.scope + "/" + self.name
+        else:
+            self.scope = self.name
+        dict.__init__(self)
+        with self.lock:
+            self.root.scopes[self.scope] = self
+            dict.update(self, self.root.read(self.scope))
+            self.root.reset_collections(self)
+            missing = [
+                key
+                for key in default
+                if key not in self and key not in self.collections
+            ]
+            for key in missing:
+                dict.__setitem__(self, key, default[key])
+        if missing:
+            self.root.mark(self.scope, *missing)
+
+    def __setitem__(self, item, value):
+        with self.lock:
+            if isinstance(item, tuple):
+                set_path(self, item, value)
+            else:
+                dict.__setitem__(self, item, value)
+        self.root.mark_item(self, item)
+        self.notify(item, value)
+
+    def __delitem__(self, item):
+        with self.lock:
+            dict.__delitem__(self, item)
+        self.root.mark(self.scope, item)
+        self.notify(item, None)
+
+    def __getitem__(self, item):
+        self.root.refresh()
+        key = item[0] if isinstance(item, tuple) else item
+        if key in self.collections:
+            self.collections[key].records
+        if isinstance(item, tuple):
+            return get_path(self, item)
+        return dict.__getitem__(self, item)
+
+    def save(self):
+        self.root.save(self.scope)
+
+    def load(self):
+        self.root.load()
+
+    def for_page(self, page, default={}):
+        if page not in self.page_stores:
+            self.page_stores[page] = SqlitePagestore(self, page, default)
+        return self.page_stores[page]
+
+    def partition(self, name, default={}):
+        if name not in self.partitions:
+            self.partitions[name] = SqlitePartition(self, name, default)
+        return self.partitions[name]
+
+    def new_collection(self, name):
+        return SqliteCollection(self, name)
+
+
+class SqlitePagestore(SqlitePartition):
+    FORMAT = Pagestore.FORMAT
+
+
+class SqliteCollection(Collection):
+    """
+    A collection of a `SqliteStore` or of it's partitions, each record is
+    a row with an id of it's own. The records are read on the first access
+    to the collection, or to it's key of the store, and only the rows of
+    the records inserted, updated or removed are written.
+    """
+
+    def __init__(self, store, name: str):
+        self.store = store
+        self.root = getattr(store, "root", store)
+        self.name = name
+        self.indexes = {}
+        self.ids = {}
+        self.next_id = 0
+        self._records = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._records is not None
+
+    @property
+    def records(self) -> list[dict]:
+        """
+        The records, read from the database if the collection was not
+        accessed since the store was loaded.
+        """
+        self.root.refresh()
+        with self.root.lock:
+            if self._records is None:
+                self._load()
+            return self._records
+
+    def _load(self):
+        scope = self.store.scope
+        rows = self.root.read_records(scope, self.name)
+        self._records = [record for _, record in rows]
+        self.ids = {id(record): rowid for rowid, record in rows}
+        self.next_id = rows[-1][0] + 1 if rows else 0
+        if not rows and dict.__contains__(self.store, self.name):
+            # a list saved at the key before it was opened as a collection
+            self._records = dict.__getitem__(self.store, self.name)
+            self.root.mark(scope, self.name)
+        dict.__setitem__(self.store, self.name, self._records)
+        for field, index in self.indexes.items():
+            self._build(field, index)
+
+    def mark(self, index: int) -> bool:
+        """
+        Marks the record at `index` changed in place.
+
+        :returns: If it was, False if the record is not one of the
+        collection's, the list at the collection's key was replaced.
+        """
+        if dict.get(self.store, self.name) is not self._records:
+            return False
+        try:
+            record = self._records[index]
+        except (IndexError, TypeError):
+            return False
+        rowid = self.ids.get(id(record))
+        if rowid is None:
+            return False
+        self.root.mark_record(self.store.scope, self.name, rowid, record)
+        return True
+
+    def _rewrite(self, records: list[dict]):
+        """
+        Replaces the rows of the records by those of `records`, the list
+        set at the collection's key, in the pending changes of the store.
+        """
+        scope = self.store.scope
+        pending = self.root.pending_records
+        for rowid in self.ids.values():
+            pending[scope, self.name, rowid] = None
+        self._records = records
+        self.ids = {}
+        for record in records:
+            self.ids[id(record)] = rowid = self.next_id
+            pending[scope, self.name, rowid] = record
+            self.next_id += 1
+        dict.__setitem__(self.store, self.name, records)
+        for field, index in self.indexes.items():
+            self._build(field, index)
+
+    def _write(self, rowid: int, record: Optional[dict]):
+        self.root.mark_record(self.store.scope, self.name, rowid, record)
+        self.store.notify(self.name, self._records)
+
+    def insert(self, record: dict) -> dict:
+        with self.root.lock:
+            self.records.append(record)
+            self._add(record)
+            self.ids[id(record)] = rowid = self.next_id
+            self.next_id += 1
+        self._write(rowid, record)
+        return record
+
+    def update(self, record: dict, **changes) -> dict:
+        """
+        Updates the fields of `record`, a record of the collection, it's
+        index entries and it's row.
+        """
+        with self.root.lock:
+            self.records  # reads the records before updating them
+            self._discard(record)
+            record.update(changes)
+            self._add(record)
+            rowid = self.ids[id(record)]
+        self._write(rowid, record)
+        return record
+
+    def remove(self, record: dict):
+        """
+        Removes `record`, a record of the collection, and it's row.
+
+        :raises ValueError: If it is not in the collection.
+        """
+        with self.root.lock:
+            records = self.records
+            for i, other in enumerate(records):
+                if other is record:
+                    del records[i]
+                    break
+            else:
+                raise ValueError("record not in the collection")
+            self._discard(record)
+            rowid = self.ids.pop(id(record))
+        self._write(rowid, None)
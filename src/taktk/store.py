@@ -1,28 +1,449 @@
+import atexit
+import io
 import json
+import marshal
 import os
+import pickle
+import struct
+import tempfile
+from collections import deque
+from contextlib import contextmanager
 from logging import getLogger
+from threading import RLock, Timer
+from time import monotonic, perf_counter
+from typing import Iterable, Optional
+from urllib.parse import quote
+from weakref import WeakSet, WeakValueDictionary
 
+try:
+    import fcntl
+except ImportError:  # not available on windows
+    fcntl = None
 
 log = getLogger(__name__)
 
+CHECK_INTERVAL = 0.1
+
+_unflushed = WeakSet()
+
+
+def write_atomic(path: str, data: str | bytes):
+    """
+    Writes `data` to a temporary file next to `path`, syncs it and renames
+    it over `path`, so a crash leaves either the old or the new file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(temp, os.stat(path).st_mode & 0o777)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+class Codec:
+    """
+    Encodes the data of a store to the bytes of it's file. Codecs other
+    than json start their files with their `magic` so a store detects the
+    codec a file was written with. Shard files are named with the codec's
+    `extension`.
+
+    Files of `safe` codecs are loaded by any store, files of other codecs
+    only by stores of that codec.
+    """
+
+    name: str
+    extension: str
+    magic: bytes = b""
+    safe: bool = True
+
+    def dumps(self, data: dict) -> bytes:
+        raise NotImplementedError()
+
+    def loads(self, data: bytes) -> dict:
+        raise NotImplementedError()
+
+
+class JsonCodec(Codec):
+    name = "json"
+    extension = ".json"
+
+    def __init__(self, indent: Optional[int] = 2):
+        self.indent = indent
+
+    def dumps(self, data: dict) -> bytes:
+        return json.dumps(data, indent=self.indent).encode()
+
+    def loads(self, data: bytes) -> dict:
+        return json.loads(data) if data.strip() else {}
+
+
+class MarshalCodec(Codec):
+    """
+    The fastest codec, which can also store tuples, sets and bytes, but
+    is not safe against maliciously constructed files.
+    """
+
+    name = "marshal"
+    extension = ".marshal"
+    magic = b"\0tkm1"
+    safe = False
+
+    def dumps(self, data: dict) -> bytes:
+        return self.magic + marshal.dumps(data)
+
+    def loads(self, data: bytes) -> dict:
+        return marshal.loads(data[len(self.magic) :])
+
+
+class SafeUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"global {module}.{name} is forbidden")
+
+
+class SafePickler(pickle.Pickler):
+    """
+    Refuses, as `SafeUnpickler` would on load, the objects pickled by
+    reference to a global, so saving a value the store can't load back
+    fails instead of the store's file.
+    """
+
+    def reducer_override(self, obj):
+        raise pickle.PicklingError(
+            f"{type(obj).__qualname__} objects can't be stored, only the"
+            " builtin containers and scalars"
+        )
+
+
+def safe_dumps(value) -> bytes:
+    data = io.BytesIO()
+    SafePickler(data, pickle.HIGHEST_PROTOCOL).dump(value)
+    return data.getvalue()
+
+
+class PickleCodec(Codec):
+    """
+    A compact codec for the builtin containers and scalars, the files are
+    loaded without importing or calling anything.
+    """
+
+    name = "pickle"
+    extension = ".pickle"
+    magic = b"\0tkp1"
+
+    def dumps(self, data: dict) -> bytes:
+        return self.magic + safe_dumps(data)
+
+    def loads(self, data: bytes) -> dict:
+        return SafeUnpickler(io.BytesIO(data[len(self.magic) :])).load()
+
+
+class IndexedCodec(Codec):
+    """
+    Pickles each top level value on it's own, followed by an index of
+    their offsets, so `taktk.lazy_store.LazyStore` only decodes the values
+    accessed. Loaded as the pickle codec, without importing or calling
+    anything.
+    """
+
+    name = "indexed"
+    extension = ".indexed"
+    magic = b"\0tki1"
+    trailer = struct.Struct("<Q")
+
+    @staticmethod
+    def encode(value) -> bytes:
+        return safe_dumps(value)
+
+    @staticmethod
+    def decode(data: bytes):
+        return SafeUnpickler(io.BytesIO(data)).load()
+
+    def dumps_entries(self, entries: Iterable[tuple[str, bytes]]) -> bytes:
+        """
+        Returns the file of the keys and encoded values of `entries`.
+        """
+        parts = [self.magic]
+        index = {}
+        offset = len(self.magic)
+        for key, encoded in entries:
+            index[key] = (offset, len(encoded))
+            parts.append(encoded)
+            offset += len(encoded)
+        parts.append(self.encode(index))
+        parts.append(self.trailer.pack(offset))
+        return b"".join(parts)
+
+    def dumps(self, data: dict) -> bytes:
+        return self.dumps_entries((k, self.encode(v)) for k, v in data.items())
+
+    def index(self, data: bytes) -> dict[str, tuple[int, int]]:
+        """
+        Returns the offset and size of the values in `data`, which can be
+        an mmap.
+        """
+        (offset,) = self.trailer.unpack(data[-self.trailer.size :])
+        return self.decode(data[offset : -self.trailer.size])
+
+    def loads(self, data: bytes) -> dict:
+        return {
+            key: self.decode(data[offset : offset + size])
+            for key, (offset, size) in self.index(data).items()
+        }
+
+
+CODECS = {
+    codec.name: codec
+    for codec in (JsonCodec(), MarshalCodec(), PickleCodec(), IndexedCodec())
+}
+
+
+def get_codec(codec: str | Codec) -> Codec:
+    return CODECS[codec] if isinstance(codec, str) else codec
+
+
+def detect_codec(data: bytes, trusted: Optional[Codec] = None) -> Codec:
+    """
+    Returns the codec `data` was written with, json if it has no magic.
+
+    :param trusted: The codec of the store loading `data`, the only codec
+    which is not `safe` that can be returned.
+
+    :raises ValueError: If `data` was written with a codec which is not
+    safe, nor `trusted`.
+    """
+    if data[:1] == b"\0":
+        for codec in CODECS.values():
+            if codec.magic and data.startswith(codec.magic):
+                break
+        else:
+            return CODECS["json"]
+        if not codec.safe and codec is not trusted:
+            raise ValueError(
+                f"refusing to load a file written with the {codec.name}"
+                f" codec, only {codec.name} stores load it"
+            )
+        return codec
+    return CODECS["json"]
+
+
+def lock_path(path: str) -> str:
+    """
+    Returns the path of the hidden file locked while writing the store at
+    `path`. The store's file itself can't be locked, as writes replace it.
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.lock")
+
+
+def fingerprint(value) -> int:
+    return hash(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def get_path(mapping: dict, path: tuple):
+    """
+    Returns the value at the key path `path` of `mapping`, the first key
+    is looked up without going through `mapping.__getitem__`.
+    """
+    obj = dict.__getitem__(mapping, path[0])
+    for x in path[1:]:
+        obj = obj[x]
+    return obj
+
+
+def set_path(mapping: dict, path: tuple, value):
+    *parents, key = path
+    if parents:
+        get_path(mapping, parents)[key] = value
+    else:
+        dict.__setitem__(mapping, key, value)
+
+
+@atexit.register
+def flush_all():
+    """
+    Writes the pending changes of all write-behind stores, a store failing
+    to is logged and the others still flushed.
+    """
+    for store in list(_unflushed):
+        try:
+            store.flush()
+        except Exception:
+            log.exception("could not flush Store %s at exit", store.path)
+
+
+class StoreStats:
+    """
+    Counts the loads and saves of a store, with the bytes they read and
+    wrote and the seconds they took, and keeps the flush latencies, from
+    the first unflushed change to it's write, of the last `window`
+    saves.
+    """
+
+    COUNTERS = (
+        "loads",
+        "saves",
+        "decodes",
+        "bytes_read",
+        "bytes_written",
+        "load_time",
+        "save_time",
+    )
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        for counter in self.COUNTERS:
+            setattr(self, counter, 0)
+        self.latencies = deque(maxlen=self.window)
+
+    def loaded(self, seconds: float, size: int):
+        self.loads += 1
+        self.load_time += seconds
+        self.bytes_read += size
+
+    def decoded(self, size: int):
+        """
+        Counts a value decoded on it's own, after the store was loaded.
+        """
+        self.decodes += 1
+        self.bytes_read += size
+
+    def saved(
+        self,
+        seconds: float,
+        size: int,
+        latency: Optional[float] = None,
+    ):
+        self.saves += 1
+        self.save_time += seconds
+        self.bytes_written += size
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def as_dict(self) -> dict:
+        """
+        Returns the counters and the percentiles of the flush latencies,
+        times are in seconds.
+        """
+        from .metrics import PERCENTILES, percentile
+
+        latencies = sorted(self.latencies)
+        stats = {counter: getattr(self, counter) for counter in self.COUNTERS}
+        stats["flush_latency"] = {
+            f"p{p}": percentile(latencies, p) for p in PERCENTILES
+        }
+        return stats
+
 
 class Store(dict):
     """
     Creates a json settings file at path *sjs* _dkd df_ **ama**
+
+    The data is kept in memory and reloaded when the file's modification
+    time or size changes, checked at most every `check_interval` seconds.
+    With a `write_delay`, writes are coalesced into a background flush
+    `write_delay` seconds after the first unflushed change, pending changes
+    are also flushed by `flush()` and at exit.
+
+    The file is written with `codec`, json by default, a file written with
+    another codec is read with it and rewritten with the store's codec.
+
+    With `sharded`, partitions and page stores are stores of their own,
+    in files of the `<path>.shards` directory, opened on their first
+    access and written independently of the store and each other.
+
+    Writes hold an advisory lock on the hidden `.<name>.lock` file next to
+    the store's, where `fcntl` is available, so processes sharing the file
+    write one at a time. The lock file is left in place, deleting it while
+    a process waits on it would let two processes write at once. With
+    `merge`, a store saving over a file another process changed since it
+    was read keeps that process's values of the keys it did not change
+    itself, instead of overwriting them.
     """
 
-    def __init__(self, path: str, default: dict = {}):
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        write_delay: Optional[float] = None,
+        check_interval: float = CHECK_INTERVAL,
+        sharded: bool = False,
+        codec: str | Codec = "json",
+        merge: bool = False,
+    ):
         """
         :param path: the path to the settings file
+        :param write_delay: The seconds changes are held before being
+        written, None writes them immediately.
+        :param check_interval: The minimum seconds between checks of the
+        file for changes by other processes.
+        :param sharded: Stores partitions in files of their own.
+        :param codec: The `Codec`, or the name of one of `CODECS`, the
+        file is written with.
+        :param merge: Merges the changes of other processes by key on
+        save.
         """
         self.path = path
         self.page_stores = {}
         self.partitions = {}
+        self.collections = {}
+        self.writeables = {}
+        self.shards = {}
+        self.sharded = sharded
+        self.codec = get_codec(codec)
+        self.file_codec = None
+        self.merge = merge
+        self.listeners = set()
+        self.write_delay = write_delay
+        self.check_interval = check_interval
+        self.lock = RLock()
+        self.dirty = False
+        self._timer = None
+        self._stat = None
+        self._checked = 0.0
+        self._base = {}
+        self._lock_file = None
+        self._lock_depth = 0
+        self._changed_at = None
+        self.stats = StoreStats()
         super().__init__(default)
         try:
             self.load()
-        except Exception:
+        except FileNotFoundError:
             self.save()
+        except Exception as e:
+            corrupt = self.path + ".corrupt"
+            log.error(
+                "could not load Store %s, moved to %s: %s",
+                self.path,
+                corrupt,
+                e,
+            )
+            os.replace(self.path, corrupt)
+            self.save()
+        else:
+            if self.file_codec not in (None, self.codec):
+                log.info("converting Store %s to %s", path, self.codec.name)
+                self.save()
+
+    def _file_stat(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
 
     def load(self):
         """
@@ -31,54 +452,320 @@ class Store(dict):
         :raises OSError: in case the faile to open the file
         :param c: dd
         """
-        with open(self.path) as f:
-            self.update(json.loads(f.read()))
+        stat = self._file_stat()
+        begin = perf_counter()
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        codec = detect_codec(raw, self.codec)
+        data = codec.loads(raw)
+        self.stats.loaded(perf_counter() - begin, len(raw))
+        with self.lock:
+            self.update(data)
+            self._stat = stat
+            self._checked = monotonic()
+            self.file_codec = codec if raw else None
+            if self.merge:
+                self._base = {k: fingerprint(v) for k, v in self.items()}
+
+    def refresh(self) -> bool:
+        """
+        Reloads the file if it changed since it was loaded or saved, unless
+        there are unflushed changes or it was checked less than
+        `check_interval` seconds ago.
+
+        :returns: If the file was reloaded.
+        """
+        now = monotonic()
+        if self.dirty or now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        if self._file_stat() == self._stat:
+            return False
+        self.load()
+        self.watch_writeables()
+        return True
+
+    def watch_writeables(self):
+        """
+        Warns the subscribers of the writeables whose value changed, after
+        a reload.
+        """
+        for writeables in list(self.writeables.values()):
+            for writeable in list(writeables.values()):
+                writeable.watch_changes()
+
+    @contextmanager
+    def file_lock(self):
+        """
+        Context manager holding the lock of the store's file, reentrant
+        in the thread holding `lock`.
+        """
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+            if not self._lock_depth:
+                self._lock_file = open(lock_path(self.path), "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def merge_file(self) -> bool:
+        """
+        Merges the file, if another process changed it since it was read,
+        into the store: the keys changed in memory since keep their value,
+        the others take the file's, to be called holding `file_lock`.
+
+        :returns: If values were taken from the file.
+        """
+        if self._file_stat() in (None, self._stat):
+            return False
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        theirs = detect_codec(raw, self.codec).loads(raw)
+        taken = False
+        for key in set(self._base) | set(self) | set(theirs):
+            if dict.__contains__(self, key):
+                ours = fingerprint(dict.__getitem__(self, key))
+            else:
+                ours = None
+            if ours != self._base.get(key):
+                continue
+            taken = True
+            if key in theirs:
+                dict.__setitem__(self, key, theirs[key])
+            else:
+                dict.pop(self, key, None)
+        return taken
 
     def save(self):
-        with open(self.path, "w") as f:
-            f.write(json.dumps(self, indent=2))
+        with self.lock, self.file_lock():
+            merged = self.merge and self.merge_file()
+            self.write()
+        _unflushed.discard(self)
+        if merged:
+            self.watch_writeables()
+
+    def write(self):
+        """
+        Writes the store to it's file, to be called holding `file_lock`.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        begin = perf_counter()
+        data = dict(self)
+        encoded = self.codec.dumps(data)
+        write_atomic(self.path, encoded)
+        self.saved(begin, len(encoded))
+        if self.merge:
+            self._base = {k: fingerprint(v) for k, v in data.items()}
+        self.dirty = False
+        self._stat = self._file_stat()
+
+    def touched(self):
+        """
+        Notes the time of the first change since the last write.
+        """
+        if self._changed_at is None:
+            self._changed_at = perf_counter()
+
+    def saved(self, begin: float, size: int):
+        """
+        Records a write of `size` bytes started at `begin`.
+        """
+        now = perf_counter()
+        latency = None
+        if self._changed_at is not None:
+            latency, self._changed_at = now - self._changed_at, None
+        self.stats.saved(now - begin, size, latency)
+
+    def flush(self):
+        """
+        Writes the pending changes now.
+        """
+        for shard in list(self.shards.values()):
+            shard.flush()
+        try:
+            if self.dirty:
+                self.save()
+        except Exception as e:
+            log.error("while flushing Store %s: %s", self.path, e)
+            raise
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        except Exception:
+            log.exception("background flush of Store %s failed", self.path)
+            # the changes are kept dirty, flush_all retries them at exit
+            _unflushed.add(self)
+
+    def changed(self, key=None, value=None):
+        """
+        Saves the store, or schedules the save with a `write_delay`.
+
+        :param key: The key changed, a tuple for nested keys.
+        :param value: The value set.
+        """
+        self.touched()
+        if self.write_delay is None:
+            return self.save()
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self.lock:
+            self.dirty = True
+            if self._timer is None:
+                self._timer = Timer(self.write_delay, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+        _unflushed.add(self)
 
     def __getitem__(self, item):
         try:
-            self.load()
+            self.refresh()
         except Exception as e:
             log.info("while loading Store", self)
             log.error(e)
             raise
         if isinstance(item, tuple):
-            obj = self
-            for x in item:
-                obj = obj[x]
-            return x
+            return get_path(self, item)
         else:
             return super().__getitem__(item)
 
     def __setitem__(self, item, value):
-        if isinstance(item, tuple):
-            *path, item = item
-            obj = self
-            for x in path:
-                obj = obj[x]
-            obj[item] = value
-        else:
-            super().__setitem__(item, value)
+        key = item
+        with self.lock:
+            if isinstance(item, tuple):
+                set_path(self, item, value)
+            else:
+                super().__setitem__(item, value)
         try:
-            self.save()
+            self.changed(key, value)
         except Exception as e:
             log.info("while saving Store", self)
             log.error(e)
             raise
+        self.notify(key, value)
+
+    def subscribe(self, listener):
+        """
+        Subscribes `listener` to changes, it is called with the key, a
+        tuple for nested keys, and the value set.
+        """
+        self.listeners.add(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.discard(listener)
+
+    def notify(self, key, value):
+        for listener in set(self.listeners):
+            listener(key, value)
+        top = key[0] if isinstance(key, tuple) else key
+        if top in self.writeables:
+            for writeable in list(self.writeables[top].values()):
+                writeable.changed(key)
+
+    def writeable(self, path, default=None):
+        """
+        Returns a `taktk.writeable.StoreWriteable` of the value at key
+        `path`, a tuple for nested keys, it's subscribers are only warned of
+        changes to that path, and setting it writes to the store.
+
+        :param default: The value of the writeable while the path does not
+        exist.
+        """
+        from .writeable import StoreWriteable
+
+        if not isinstance(path, tuple):
+            path = (path,)
+        if path[0] not in self.writeables:
+            self.writeables[path[0]] = WeakValueDictionary()
+        writeables = self.writeables[path[0]]
+        writeable = writeables.get(path)
+        if writeable is None:
+            writeable = writeables[path] = StoreWriteable(self, path, default)
+        return writeable
 
     def for_page(self, page, default={}):
         if page not in self.page_stores:
-            self.page_stores[page] = Pagestore(self, page, default=default)
+            if self.sharded:
+                store = self.shard("page", page, Pagestore, default)
+            else:
+                store = Pagestore(self, page, default=default)
+            self.page_stores[page] = store
         return self.page_stores[page]
 
     def partition(self, name, default={}):
         if name not in self.partitions:
-            self.partitions[name] = StorePartition(self, name, default=default)
+            if self.sharded:
+                store = self.shard("partition", name, StorePartition, default)
+            else:
+                store = StorePartition(self, name, default=default)
+            self.partitions[name] = store
         return self.partitions[name]
 
+    def shard(self, kind: str, name: str, Partition: type, default={}):
+        """
+        Opens the store of the partition `name` in it's own file, a store
+        of the same class as this one. The partition is moved out of this
+        store if it was saved in it before sharding.
+
+        :param kind: The prefix of the shard's file name.
+        :param Partition: The partition class whose key holds the
+        unsharded partition.
+        """
+        directory = self.path + ".shards"
+        os.makedirs(directory, exist_ok=True)
+        filename = f"{kind}.{quote(name, safe='')}{self.codec.extension}"
+        path = os.path.join(directory, filename)
+        key = Partition.FORMAT.format(name)
+        moved = not os.path.exists(path) and dict.__contains__(self, key)
+        if moved:
+            default = {**default, **dict.__getitem__(self, key)}
+        shard = type(self)(
+            path,
+            default,
+            write_delay=self.write_delay,
+            check_interval=self.check_interval,
+            sharded=True,
+            codec=self.codec,
+            merge=self.merge,
+        )
+        shard.stats = self.stats
+        if moved:
+            with self.lock:
+                dict.pop(self, key, None)
+            self.changed()
+        self.shards[path] = shard
+        return shard
+
+    def collection(self, name, indexes=()):
+        """
+        Returns the `Collection` of the records listed at key `name`,
+        creating the list if missing.
+
+        :param indexes: The fields to index, added to those of the
+        collection if already created.
+        """
+        if name not in self.collections:
+            self.collections[name] = self.new_collection(name)
+        collection = self.collections[name]
+        for field in indexes:
+            collection.index(field)
+        return collection
+
+    def new_collection(self, name) -> "Collection":
+        return Collection(self, name)
+
     def __hash__(self):
         return hash(self.path)
 
@@ -88,7 +775,11 @@ class StorePartition(Store):
 
     def __init__(self, store, name, default={}):
         self.store = store
+        self.lock = store.lock
         self.partitions = {}
+        self.collections = {}
+        self.writeables = {}
+        self.listeners = set()
         self.name = self.FORMAT.format(name)
         dict.__init__(self, default)
         try:
@@ -97,15 +788,21 @@ class StorePartition(Store):
             self.save()
 
     def __setitem__(self, item, value):
-        dict.__setitem__(self, item, value)
+        with self.lock:
+            if isinstance(item, tuple):
+                set_path(self, item, value)
+            else:
+                dict.__setitem__(self, item, value)
         self.save()
+        self.notify(item, value)
 
     def __getitem__(self, item):
+        if isinstance(item, tuple):
+            return get_path(self, item)
         return dict.__getitem__(self, item)
 
     def save(self):
-        self.store[self.name] = self
-        self.store.save()
+        self.store[self.name] = dict(self)
 
     def load(self):
         data = self.store[self.name]
@@ -114,3 +811,301 @@ class StorePartition(Store):
 
 class Pagestore(StorePartition):
     FORMAT = "~~[$__pageStore__('{0}')]~~"
+
+
+class Collection:
+    """
+    The list of dict records at a key of a store, with hash indexes on
+    chosen fields kept up to date as records are inserted, updated and
+    removed through the collection, so lookups do not scan the list.
+
+    The indexes are built when the list is first accessed and rebuilt
+    when the store reloads it.
+    """
+
+    def __init__(self, store: Store, name: str):
+        self.store = store
+        self.name = name
+        self.indexes = {}
+        self._records = None
+        with store.lock:
+            if name not in store:
+                store[name] = []
+
+    @property
+    def records(self) -> list[dict]:
+        """
+        The records, with the indexes rebuilt if the store reloaded them.
+        """
+        records = self.store[self.name]
+        if records is not self._records:
+            with self.store.lock:
+                self._records = records
+                for field, index in self.indexes.items():
+                    self._build(field, index)
+        return records
+
+    def _build(self, field: str, index: dict):
+        index.clear()
+        for record in self._records:
+            if field in record:
+                index.setdefault(record[field], []).append(record)
+
+    def index(self, field: str):
+        """
+        Indexes the records by `field`.
+        """
+        if field not in self.indexes:
+            self.indexes[field] = index = {}
+            if self._records is not None:
+                self._build(field, index)
+
+    def find(self, field: str, value) -> list[dict]:
+        """
+        Returns the records whose `field` equals `value`, by it's index if
+        `field` is indexed, else by scanning.
+        """
+        records = self.records
+        if field in self.indexes:
+            return list(self.indexes[field].get(value, ()))
+        return [r for r in records if field in r and r[field] == value]
+
+    def get(self, field: str, value) -> dict:
+        """
+        Returns the first record whose `field` equals `value`.
+
+        :raises KeyError: If there is none.
+        """
+        found = self.find(field, value)
+        if not found:
+            raise KeyError((field, value))
+        return found[0]
+
+    def _add(self, record: dict):
+        for field, index in self.indexes.items():
+            if field in record:
+                index.setdefault(record[field], []).append(record)
+
+    def _discard(self, record: dict):
+        for field, index in self.indexes.items():
+            if field in record:
+                bucket = index.get(record[field], [])
+                for i, other in enumerate(bucket):
+                    if other is record:
+                        del bucket[i]
+                        break
+                if not bucket:
+                    index.pop(record[field], None)
+
+    def _save(self):
+        self.store[self.name] = self._records
+
+    def insert(self, record: dict) -> dict:
+        with self.store.lock:
+            self.records.append(record)
+            self._add(record)
+        self._save()
+        return record
+
+    def update(self, record: dict, **changes) -> dict:
+        """
+        Updates the fields of `record`, a record of the collection, and
+        it's index entries.
+        """
+        with self.store.lock:
+            self.records  # rebuilds stale indexes before updating them
+            self._discard(record)
+            record.update(changes)
+            self._add(record)
+        self._save()
+        return record
+
+    def remove(self, record: dict):
+        """
+        Removes `record`, a record of the collection.
+
+        :raises ValueError: If it is not in the collection.
+        """
+        with self.store.lock:
+            records = self.records
+            for i, other in enumerate(records):
+                if other is record:
+                    del records[i]
+                    break
+            else:
+                raise ValueError("record not in the collection")
+            self._discard(record)
+        self._save()
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+
+class JournaledStore(Store):
+    """
+    A store appending each change, as a json line of it's key path and
+    value, to a journal next to the file, so writing costs the size of the
+    change. Changes within `write_delay` are appended and synced together,
+    the journal is compacted into the file, written atomically, once it
+    grows past `compact_size` bytes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default: dict = {},
+        write_delay: Optional[float] = 0.05,
+        check_interval: float = CHECK_INTERVAL,
+        compact_size: int = 1 << 20,
+        sharded: bool = False,
+        codec: str | Codec = "json",
+        merge: bool = False,
+    ):
+        """
+        :param write_delay: The seconds changes are batched before being
+        appended and synced, None syncs each change.
+        :param compact_size: The journal size in bytes triggering a
+        compaction.
+        """
+        self.journal_path = path + ".journal"
+        self.compact_size = compact_size
+        self.pending = []
+        super().__init__(
+            path,
+            default,
+            write_delay,
+            check_interval,
+            sharded,
+            codec,
+            merge,
+        )
+
+    def _file_stat(self) -> Optional[tuple]:
+        stat = super()._file_stat()
+        try:
+            journal = os.stat(self.journal_path)
+        except OSError:
+            return stat
+        return (stat, journal.st_mtime_ns, journal.st_size)
+
+    def load(self):
+        """
+        Loads the file and replays the journal over it, a truncated last
+        entry, from a crash while appending, is dropped by compacting.
+        """
+        try:
+            super().load()
+        except FileNotFoundError:
+            if not os.path.exists(self.journal_path):
+                raise
+            self._stat = self._file_stat()
+        try:
+            journal = open(self.journal_path)
+        except FileNotFoundError:
+            return
+        truncated = False
+        begin = perf_counter()
+        with journal, self.lock:
+            size = os.fstat(journal.fileno()).st_size
+            for line in journal:
+                try:
+                    key, value = json.loads(line)
+                except ValueError:
+                    log.warning("ignoring truncated entry in %s", journal.name)
+                    truncated = True
+                    break
+                try:
+                    self._apply(key, value)
+                except (KeyError, TypeError, IndexError):
+                    log.warning("ignoring journal entry of %r", key)
+        self.stats.load_time += perf_counter() - begin
+        self.stats.bytes_read += size
+        if truncated:
+            # later appends would follow the partial line
+            self.save()
+
+    def _apply(self, key, value):
+        if isinstance(key, list):
+            *path, key = key
+            obj = self
+            for x in path:
+                obj = obj[x]
+            dict.__setitem__(obj, key, value)
+        else:
+            dict.__setitem__(self, key, value)
+
+    def changed(self, key=None, value=None):
+        if key is None:
+            return self.save()
+        if isinstance(key, tuple):
+            key = list(key)
+        entry = json.dumps([key, value]) + "\n"
+        with self.lock:
+            self.touched()
+            self.pending.append(entry)
+        if self.write_delay is None:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def flush(self):
+        """
+        Appends the pending changes to the journal and syncs it,
+        compacting it if it grew past `compact_size`.
+        """
+        for shard in list(self.shards.values()):
+            shard.flush()
+        with self.lock, self.file_lock():
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.pending:
+                return
+            try:
+                size = self._append()
+            except Exception as e:
+                log.error("while flushing Store %s: %s", self.path, e)
+                raise
+        _unflushed.discard(self)
+        if size > self.compact_size:
+            self.save()
+
+    def _append(self) -> int:
+        begin = perf_counter()
+        data = "".join(self.pending).encode()
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        self.saved(begin, len(data))
+        self.pending.clear()
+        self.dirty = False
+        self._stat = self._file_stat()
+        return size
+
+    def save(self):
+        """
+        Compacts the journal, writing the whole store to the file
+        atomically then emptying the journal. Changes other processes
+        journaled are loaded first, as the journal is keyed by change it
+        is always merged.
+        """
+        with self.lock, self.file_lock():
+            stale = self._file_stat() != self._stat
+            if self.pending:
+                self._append()
+            if stale:
+                self.load()
+            self.write()
+            try:
+                os.unlink(self.journal_path)
+            except FileNotFoundError:
+                pass
+            self._stat = self._file_stat()
+        _unflushed.discard(self)
+        if stale:
+            self.watch_writeables()
@@ -23,7 +23,7 @@ import os.path
 import string
 from decimal import Decimal
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 from pyoload import annotate
 
@@ -368,7 +368,7 @@ class State:
     def parse_next_tag(self) -> None:
         """Return next tag."""
         name, alias = self.next_tag_name()
-        attrs = {}
+        attrs = TemplateAttrs()
         while self:
             self.skip_spaces()
             if self[...] == "#":
@@ -422,6 +422,61 @@ class State:
             return root
 
 
+class TemplateAttrs(dict):
+    """
+    Raw attributes of a template tag, shared by all the components created
+    from the tag, caches what can be derived from the raw strings.
+    """
+
+    __slots__ = ("cache",)
+
+    def __init__(self, *args, **kwargs):
+        """Create the attributes with an empty cache."""
+        super().__init__(*args, **kwargs)
+        self.cache = {}
+
+
+def derived(attrs: dict[str, str], name: str, compute: Callable):
+    """
+    Return `compute(attrs)`, cached under `name` for template attributes.
+    """
+    if not isinstance(attrs, TemplateAttrs):
+        return compute(attrs)
+    if name not in attrs.cache:
+        attrs.cache[name] = compute(attrs)
+    return attrs.cache[name]
+
+
+def split_attr_paths(attrs: dict[str, str]):
+    """Split attribute names like `pos:grid` into key paths."""
+    return tuple((tuple(key.split(":")), val) for key, val in attrs.items())
+
+
+def attr_paths(attrs: dict[str, str]):
+    """Key paths of raw attributes, cached for template attributes."""
+    return derived(attrs, "paths", split_attr_paths)
+
+
+def is_dynamic(string: str) -> bool:
+    """Return if the literal is an expression evaluated in a namespace."""
+    return len(string) > 2 and string[0] == "{" and string[-1] == "}"
+
+
+def is_media(string: str) -> bool:
+    """Return if the literal is a media spec, like `img:@logo`."""
+    return ":" in string and string[: string.index(":")].isalpha()
+
+
+def template_media(item: "Template.Item") -> Iterator[str]:
+    """Yield the static media specs of the tags in a template tree."""
+    if item.type == TagType.TAG:
+        for value in item.args[1].values():
+            if is_media(value):
+                yield value
+    for child in item.children:
+        yield from template_media(child)
+
+
 def evaluate_literal(string: str, namespace=None):
     """Evaluate a litteral from string."""
     from .media import get_media
@@ -442,7 +497,7 @@ def evaluate_literal(string: str, namespace=None):
         return True
     elif string == "False":
         return False
-    elif ":" in string and string[: string.index(":")].isalpha():
+    elif is_media(string):
         return get_media(string)
     elif len(string_set - INT) == 0 and string.isnumeric():
         return int(string)
@@ -10,6 +10,7 @@ Composes of:
 """
 import builtins
 from contextlib import contextmanager
+from copy import deepcopy
 from functools import cached_property
 from tkinter import IntVar, StringVar
 from typing import Any, Callable, Iterable, Optional
@@ -259,6 +260,55 @@ class Writeable(Subscribeable):
         return WritableBoolVar(self)
 
 
+class StoreWriteable(Writeable):
+    """
+    A writeable of the value at a key path of a `taktk.store.Store`,
+    created by `Store.writeable`. Setting it writes to the store, so it is
+    saved with the store's batching, and it's subscribers are warned when
+    the store changes the path, or a key containing it, and the value
+    changed.
+    """
+
+    def __init__(self, store, path: tuple, default: Any = None):
+        self.store = store
+        self.path = path
+        self.key = path if len(path) > 1 else path[0]
+        self.default = default
+        super().__init__(default, self._get, self._set)
+        self.last = deepcopy(self._get())
+
+    def _get(self):
+        try:
+            return self.store[self.key]
+        except (KeyError, IndexError, TypeError):
+            return self.default
+
+    def _set(self, value: Any):
+        self.store[self.key] = value
+
+    def watch_changes(self) -> bool:
+        """
+        Check if value changed and notify subscribers.
+
+        The store's values are changed in place when a path in them is set,
+        so it's compared to a copy kept at the last notification.
+        """
+        if self.last != (val := self.get()):
+            self.last = deepcopy(val)
+            self.warn_subscribers()
+            return True
+        return False
+
+    def changed(self, key):
+        """
+        Called by the store when `key` changed.
+        """
+        key = key if isinstance(key, tuple) else (key,)
+        length = min(len(key), len(self.path))
+        if key[:length] == self.path[:length]:
+            self.watch_changes()
+
+
 class WritableVar(Subscribeable, Subscriber):
     """Writeable tkinter variable binding with automatic updates."""
 
@@ -0,0 +1,59 @@
+"""
+Tests the command queue running server requests on the tk thread and
+the events streamed to clients.
+"""
+from concurrent.futures import TimeoutError as FutureTimeout
+from threading import Thread
+from types import SimpleNamespace
+
+from taktk.application import application_server
+from taktk.component.backend import HeadlessBackend
+
+
+def call_in_thread(func):
+    result = {}
+
+    def run():
+        try:
+            result["value"] = func()
+        except Exception as e:
+            result["error"] = e
+
+    thread = Thread(target=run)
+    thread.start()
+    thread.join()
+    return result
+
+
+def test_timed_out_calls_do_not_run():
+    queue = application_server.CommandQueue(HeadlessBackend().root())
+    ran = []
+    result = call_in_thread(
+        lambda: queue.call(ran.append, "late", timeout=0.01),
+    )
+    assert isinstance(result["error"], FutureTimeout)
+    assert queue.drain() == 0
+    assert ran == []
+
+
+def test_queued_calls_run_on_drain():
+    queue = application_server.CommandQueue(HeadlessBackend().root())
+    ran = []
+    thread = Thread(target=queue.call, args=(ran.append, "drained"))
+    thread.start()
+    while queue.queue.empty():
+        pass
+    assert queue.drain() == 1
+    thread.join()
+    assert ran == ["drained"]
+
+
+def test_store_events_only_carry_the_key():
+    server = SimpleNamespace(events=application_server.EventStream())
+    on_store_change = application_server.ApplicationServer.on_store_change
+    on_store_change(server, "ignored", "no client")
+    client = server.events.connect()
+    on_store_change(server, ("user", "password"), "secret")
+    event = client.get_nowait()
+    assert event == {"event": "store", "key": ("user", "password")}
+    assert client.empty()
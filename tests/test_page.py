@@ -0,0 +1,70 @@
+"""
+Tests the page view's history and component cache with the headless
+backend.
+"""
+import types
+
+import pytest
+
+from taktk.application import Application
+from taktk.component import Component
+from taktk.component.backend import HeadlessBackend, set_backend
+from taktk.page import PageView
+from taktk.store import Store
+
+
+class Layout(Component):
+    _code_ = r"""
+    \frame
+        \label text={{title}} pos:grid=0,0
+        \frame:outlet pos:grid=0,1
+    """
+
+    def init(self):
+        self["title"] = "title"
+
+
+class Page(Component):
+    _code_ = r"\frame"
+
+
+@pytest.fixture
+def backend():
+    backend = HeadlessBackend()
+    previous = set_backend(backend)
+    yield backend
+    set_backend(previous)
+
+
+@pytest.fixture
+def view(backend, tmp_path):
+    pages = types.ModuleType("pages")
+    pages.__package__ = "pages"
+    pages.layout = Layout
+    for name in "abc":
+        setattr(pages, name, lambda store: Page())
+    app = Application(pages, store=Store(str(tmp_path / "store.json")))
+    app.setup_taktk()
+    return PageView(backend.root(), app.pages, app, destroy_cache=1)
+
+
+def test_kept_entries_render_their_own_layout(view):
+    view.url("/@a")
+    view.url("/@b")
+    first, second = (entry.components[0] for entry in view.history)
+    assert first is not second
+    first["title"] = "changed"
+    first.update()
+    label = first.container.winfo_children()[0]
+    assert label.cget("text") == "changed"
+
+
+def test_dropped_entries_give_their_instances_back(view):
+    view.url("/@a")
+    layout = view.history[0].components[0]
+    view.url("/@b")
+    view.url("/@c")
+    assert view.history[0].widget is None
+    view.url("/@a")
+    assert view.current_entry.components[0] is layout
+    assert view.cache.hits == 1
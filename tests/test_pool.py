@@ -0,0 +1,55 @@
+"""
+Tests recycling widgets through the pool with the headless backend.
+"""
+from tkinter import ttk
+
+import pytest
+
+from taktk.component.backend import HeadlessBackend, set_backend
+from taktk.component.pool import WidgetPool
+
+
+@pytest.fixture
+def backend():
+    backend = HeadlessBackend()
+    previous = set_backend(backend)
+    yield backend
+    set_backend(previous)
+
+
+def test_released_widget_is_reused(backend):
+    pool = WidgetPool()
+    root = backend.root()
+    frame = pool.acquire(ttk.Frame, root, {"padding": 5})
+    assert pool.release(frame)
+    assert pool.acquire(ttk.Frame, root) is frame
+    assert frame.cget("padding") == ""
+    assert (pool.hits, pool.misses) == (1, 1)
+
+
+def test_widgets_of_destroyed_parents_are_pruned(backend):
+    pool = WidgetPool(cap=2)
+    root = backend.root()
+    parent = backend.create(ttk.Frame, root, {})
+    for _ in range(2):
+        pool.release(pool.acquire(ttk.Label, parent))
+    assert pool.size == 1
+    pool.release(pool.acquire(ttk.Label, parent))
+    pool.release(pool.acquire(ttk.Button, parent))
+    assert pool.size == 2
+    parent.destroy()
+    assert pool.release(pool.acquire(ttk.Label, root))
+    assert pool.size == 1
+    assert list(pool.widgets) == [pool.key(ttk.Label, root, {})]
+
+
+def test_reused_frame_has_no_weights(backend):
+    pool = WidgetPool()
+    root = backend.root()
+    frame = pool.acquire(ttk.Frame, root)
+    frame.grid_columnconfigure((0, 1), weight=5)
+    frame.grid_rowconfigure(2, weight=1)
+    assert frame.grid_size() == (2, 3)
+    pool.release(frame)
+    assert pool.acquire(ttk.Frame, root) is frame
+    assert frame.grid_size() == (0, 0)
@@ -0,0 +1,11 @@
+"""
+Checks the `taktk.prefetch` shortcut is not shadowed by the module of the
+prefetch worker, imported by `taktk.page`.
+"""
+import taktk
+import taktk.page
+
+
+def test_prefetch_is_the_function():
+    assert callable(taktk.prefetch)
+    assert taktk.prefetch("/todos") == 0
@@ -0,0 +1,93 @@
+"""
+Asserts the tcl calls rendering components and navigating pages cost,
+counted with the headless backend.
+"""
+import types
+
+import pytest
+
+from taktk.application import Application
+from taktk.component import Component
+from taktk.component.backend import HeadlessBackend, set_backend
+from taktk.page import PageView
+from taktk.store import Store
+
+ROWS = 50
+WIDGETS = 3 * ROWS + 1
+ROW = r"""
+    \frame pos:grid={{(0, {0})}} lay:w:x='0:5,1:1'
+        \label text='row {0}' pos:grid=0,0 pos:sticky='nsew'
+        \button text='open' pos:grid=1,0 pos:sticky='e'"""
+
+
+def make_page(name: str) -> type:
+    code = r"\frame padding=5" + "".join(ROW.format(i) for i in range(ROWS))
+    return type(name, (Component,), {"_code_": code})
+
+
+@pytest.fixture
+def backend():
+    backend = HeadlessBackend()
+    previous = set_backend(backend)
+    yield backend
+    set_backend(previous)
+
+
+@pytest.fixture
+def view(backend, tmp_path):
+    pages = types.ModuleType("pages")
+    pages.__package__ = "pages"
+    A, B = make_page("A"), make_page("B")
+    pages.a = lambda store: A()
+    pages.b = lambda store: B()
+    app = Application(pages, store=Store(str(tmp_path / "store.json")))
+    app.setup_taktk()
+    return PageView(backend.root(), app.pages, app)
+
+
+def test_unknown_widget_methods_raise(backend):
+    with pytest.raises(AttributeError):
+        backend.root().focus_set()
+
+
+def test_instantiate_makes_no_calls(backend):
+    Page = make_page("Page")
+    with backend.recording() as calls:
+        Page()
+    assert sum(calls.values()) == 0
+
+
+def test_render(backend):
+    page = make_page("Page")()
+    with backend.recording() as calls:
+        page.render(backend.root())
+    # the page's own frame is placed by it's parent
+    assert calls == {
+        "create": WIDGETS,
+        "grid": WIDGETS - 1,
+        "grid_columnconfigure": 2 * ROWS,
+    }
+
+
+def test_navigate(backend, view):
+    with backend.recording() as calls:
+        view.url("/@a")
+        backend.run_pending()
+    # plus the outlet's weights and the page's placement in it
+    assert calls == {
+        "create": WIDGETS,
+        "grid": WIDGETS,
+        "grid_columnconfigure": 2 * ROWS + 1,
+        "grid_rowconfigure": 1,
+    }
+
+
+def test_back_and_forward_regrid_kept_pages(backend, view):
+    view.url("/@a")
+    view.url("/@b")
+    backend.run_pending()
+    with backend.recording() as calls:
+        view.url("!back")
+        view.url("!forward")
+        backend.run_pending()
+    assert calls == {"grid": 2, "grid_remove": 2}
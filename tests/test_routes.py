@@ -0,0 +1,107 @@
+"""
+Tests resolving urls to page modules and converting their query strings.
+"""
+import sys
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+import pytest
+
+from taktk.page import Error404, RouteTable
+from taktk.query import PageHandler, QueryError
+
+PAGES = {
+    "__init__.py": "def default(store):\n    pass\n",
+    "users/__init__.py": "layout = 'users'\n",
+    "users/new.py": "",
+    "users/int.py": "layout = 'user'\n",
+    "notes/__init__.py": "",
+    "notes/uuid.py": "",
+}
+
+
+@pytest.fixture
+def routes(tmp_path, monkeypatch):
+    for name, code in PAGES.items():
+        path = tmp_path / "routepages" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import routepages
+
+    yield RouteTable(routepages)
+    for name in [m for m in sys.modules if m.split(".")[0] == "routepages"]:
+        del sys.modules[name]
+
+
+def test_static_segments(routes):
+    module, params, layouts = routes.resolve("/users/new")
+    assert module.__name__ == "routepages.users.new"
+    assert params == []
+    assert layouts == ["users"]
+
+
+def test_pattern_segments_are_converted(routes):
+    module, params, layouts = routes.resolve("/users/12/")
+    assert module.__name__ == "routepages.users.int"
+    assert params == [12]
+    assert layouts == ["users", "user"]
+    uuid = "0b5a2a4e-8d0c-11ef-9a3b-0242ac120002"
+    assert routes.resolve(f"notes/{uuid}")[1] == [UUID(uuid)]
+
+
+def test_root_and_unknown_paths(routes):
+    assert routes.resolve("/")[0].__name__ == "routepages"
+    for path in ("/missing", "/users/abc", "/users/12/edit"):
+        with pytest.raises(Error404):
+            routes.resolve(path)
+
+
+class Color(Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+def handler(
+    store,
+    count: int,
+    done: bool = False,
+    tags: list[int] = (),
+    color: Optional[Color] = None,
+    options: dict = {},
+    page=1,
+    name="",
+):
+    pass
+
+
+def test_query_conversion():
+    query = {
+        "count": "3",
+        "done": "yes",
+        "tags": "1,2",
+        "color": "blue",
+        "options": '{"a": 1}',
+        "page": "2",
+        "name": "12",
+    }
+    assert PageHandler(handler).convert(query) == {
+        "count": 3,
+        "done": True,
+        "tags": [1, 2],
+        "color": Color.BLUE,
+        "options": {"a": 1},
+        "page": 2,
+        "name": "12",
+    }
+    assert PageHandler(handler).convert({"color": "null"}) == {"color": None}
+
+
+@pytest.mark.parametrize(
+    "query",
+    [{"count": "three"}, {"done": "maybe"}, {"options": "[]"}, {"other": ""}],
+)
+def test_wrong_queries_raise(query):
+    with pytest.raises(QueryError):
+        PageHandler(handler).convert(query)
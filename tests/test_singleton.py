@@ -0,0 +1,39 @@
+"""
+Tests handing urls to a running instance over it's unix socket.
+"""
+import socket
+
+import pytest
+
+from taktk import singleton
+
+pytestmark = pytest.mark.skipif(
+    not singleton.supported,
+    reason="unix sockets are not supported",
+)
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+
+def test_handoff_without_instance():
+    assert singleton.handoff("app", "/") is None
+
+
+def test_handoff_to_silent_instance():
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(singleton.socket_path("app"))
+        server.listen()
+        assert singleton.handoff("app", "/", timeout=0.05) is None
+
+
+def test_second_server_raises_file_exists():
+    path = singleton.socket_path("app")
+    server = singleton.SingletonServer(None, path)
+    try:
+        with pytest.raises(FileExistsError):
+            singleton.SingletonServer(None, path)
+    finally:
+        server.server_close()
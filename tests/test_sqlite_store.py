@@ -0,0 +1,91 @@
+"""
+Tests the sqlite store's rows, collections and the import of store files.
+"""
+import json
+import sqlite3
+
+import pytest
+
+from taktk.sqlite_store import SqliteStore
+from taktk.store import Store
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "store.db")
+
+
+def rows(path, table):
+    with sqlite3.connect(path) as db:
+        return db.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3").fetchall()
+
+
+def test_keys_round_trip(path):
+    store = SqliteStore(path)
+    store["name"] = "todo"
+    store["user"] = {"name": ""}
+    store["user", "name"] = "a"
+    store.partition("part")["count"] = 3
+    store.close()
+    store = SqliteStore(path)
+    assert dict(store) == {"name": "todo", "user": {"name": "a"}}
+    assert store.partition("part")["count"] == 3
+
+
+def test_collection_records_are_rows(path):
+    store = SqliteStore(path)
+    todos = store.collection("todos", ("uuid",))
+    first = todos.insert({"uuid": "1", "done": False})
+    todos.insert({"uuid": "2", "done": False})
+    todos.update(first, done=True)
+    todos.remove(todos.get("uuid", "2"))
+    store["todos", 0, "desc"] = "write tests"
+    assert rows(path, "store") == []
+    assert [row[:3] for row in rows(path, "record")] == [("", "todos", 0)]
+    store.close()
+    store = SqliteStore(path)
+    todos = store.collection("todos", ("uuid",))
+    assert todos._records is None
+    expected = {"uuid": "1", "done": True, "desc": "write tests"}
+    assert todos.get("uuid", "1") == expected
+    assert store["todos"] == [expected]
+
+
+def test_collection_set_at_it_s_key(path):
+    store = SqliteStore(path)
+    store.collection("todos").insert({"uuid": "1"})
+    store["todos"] = [{"uuid": "2"}, {"uuid": "3"}]
+    store.close()
+    store = SqliteStore(path)
+    assert [r["uuid"] for r in store.collection("todos")] == ["2", "3"]
+
+
+def test_list_saved_before_moves_to_records(path):
+    store = SqliteStore(path)
+    store.for_page("admin")["users"] = [{"name": "a"}, {"name": "b"}]
+    store.close()
+    store = SqliteStore(path)
+    users = store.for_page("admin", {"users": []}).collection("users")
+    assert users.get("name", "b") == {"name": "b"}
+    assert rows(path, "store") == []
+    assert len(rows(path, "record")) == 2
+
+
+def test_failed_commit_rolls_back(path):
+    store = SqliteStore(path)
+    store["kept"] = 1
+    with pytest.raises(TypeError):
+        store["unserializable"] = object()
+    assert not store.db.in_transaction
+    del store["unserializable"]
+    store.close()
+    assert SqliteStore(path) == {"kept": 1}
+
+
+def test_imports_store_file(path):
+    Store(path, {"name": "todo", "todos": [{"uuid": "1"}]})
+    store = SqliteStore(path)
+    assert store["name"] == "todo"
+    assert store.collection("todos").get("uuid", "1") == {"uuid": "1"}
+    with open(path + ".imported") as f:
+        assert json.load(f)["name"] == "todo"
@@ -0,0 +1,129 @@
+"""
+Round trips the store codecs and backends through their files.
+"""
+import pickle
+from decimal import Decimal
+from functools import partial
+
+import pytest
+
+from taktk.lazy_store import LazyStore
+from taktk.sqlite_store import SqliteStore
+from taktk.store import CODECS, JournaledStore, Store
+
+VALUE = {
+    "name": "todo",
+    "count": 3,
+    "ratio": 0.5,
+    "done": False,
+    "missing": None,
+    "tags": ["home", "work"],
+    "nested": {"list": [1, 2, {"deep": "value"}]},
+}
+
+BACKENDS = {
+    "json": Store,
+    "journaled": partial(JournaledStore, write_delay=None),
+    "sqlite": SqliteStore,
+    "lazy": LazyStore,
+    "sharded": partial(Store, sharded=True),
+}
+
+
+@pytest.mark.parametrize("codec", CODECS.values(), ids=CODECS)
+def test_codec_round_trip(codec):
+    data = {"value": VALUE, "empty": {}}
+    assert codec.loads(codec.dumps(data)) == data
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_store_round_trip(codec, tmp_path):
+    path = str(tmp_path / "store")
+    store = Store(path, codec=codec)
+    store["value"] = VALUE
+    assert dict(Store(path, codec=codec)) == {"value": VALUE}
+
+
+@pytest.mark.parametrize("codec", ["pickle", "indexed"])
+def test_unloadable_values_are_refused_on_save(codec, tmp_path):
+    path = str(tmp_path / "store")
+    store = Store(path, codec=codec)
+    store["value"] = VALUE
+    with pytest.raises(pickle.PicklingError):
+        store["price"] = Decimal("1.5")
+    reopened = Store(path, codec=codec)
+    assert dict(reopened) == {"value": VALUE}
+    assert not (tmp_path / "store.corrupt").exists()
+
+
+def test_untrusted_codecs_are_not_detected(tmp_path):
+    path = str(tmp_path / "store")
+    Store(path, codec="marshal")["value"] = VALUE
+    assert dict(Store(path)) == {}
+    assert (tmp_path / "store.corrupt").exists()
+
+
+@pytest.mark.parametrize("codec", ["json", "pickle", "indexed"])
+def test_safe_codecs_are_converted(codec, tmp_path):
+    path = str(tmp_path / "store")
+    Store(path, codec=codec)["value"] = VALUE
+    assert dict(Store(path, codec="marshal")) == {"value": VALUE}
+    assert dict(Store(path, codec="marshal")) == {"value": VALUE}
+
+
+def test_flush_all_flushes_past_failing_stores(tmp_path):
+    from taktk.store import flush_all
+
+    failing = Store(str(tmp_path / "failing"), write_delay=60.0)
+    stores = [
+        Store(str(tmp_path / f"{i}"), write_delay=60.0) for i in range(3)
+    ]
+    failing["value"] = object()
+    for store in stores:
+        store["value"] = VALUE
+    flush_all()
+    for store in stores:
+        assert dict(Store(store.path)) == {"value": VALUE}
+    assert failing.dirty
+    dict.pop(failing, "value")
+    failing.flush()
+
+
+def test_writeable_warned_of_nested_change(tmp_path):
+    store = Store(str(tmp_path / "store.json"), write_delay=60.0)
+    store["user"] = {"name": "a"}
+    user = store.writeable("user")
+    warned = []
+    user.subscribe(lambda: warned.append(user.get()["name"]))
+    store["user", "name"] = "b"
+    store["user", "name"] = "b"
+    assert warned == ["b"]
+
+
+@pytest.mark.parametrize("open_store", BACKENDS.values(), ids=BACKENDS)
+def test_backend_persists(open_store, tmp_path):
+    path = str(tmp_path / "store")
+    store = open_store(path)
+    store["value"] = VALUE
+    store["value", "count"] = 4
+    store.partition("settings")["theme"] = "dark"
+    store.for_page("admin")["users"] = [{"name": "a"}]
+    store.flush()
+    store = open_store(path)
+    assert store["value"] == dict(VALUE, count=4)
+    assert store.partition("settings")["theme"] == "dark"
+    assert store.for_page("admin")["users"] == [{"name": "a"}]
+
+
+@pytest.mark.parametrize("open_store", BACKENDS.values(), ids=BACKENDS)
+def test_backend_persists_collections(open_store, tmp_path):
+    path = str(tmp_path / "store")
+    todos = open_store(path).collection("todos", ("uuid",))
+    first = todos.insert({"uuid": "1", "done": False})
+    todos.insert({"uuid": "2", "done": False})
+    todos.update(first, done=True)
+    todos.remove(todos.get("uuid", "2"))
+    todos.store.flush()
+    todos = open_store(path).collection("todos", ("uuid",))
+    assert list(todos) == [{"uuid": "1", "done": True}]
+    assert todos.get("uuid", "1")["done"] is True